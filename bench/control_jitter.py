@@ -0,0 +1,171 @@
+"""
+Compares MANUAL_CONTROL latency and jitter of the event-loop control path against
+the real-time control thread, with synthetic background load on the event loop.
+
+A stand-in GCS sends MANUAL_CONTROL over local UDP at a fixed rate. The real
+CrawlerController drives a stand-in Firmata board, and the latency is measured from
+the send call to the moment the servo message is written to the board's serial port.
+That includes the executor hop of the event-loop path.
+
+Usage: python -m bench.control_jitter [seconds] [--fifo PRIORITY]
+"""
+import asyncio
+import socket
+import statistics
+import sys
+import threading
+import time
+
+import pyfirmata2
+
+from pymavlink import mavutil
+
+from core import config
+from core.crawler import CrawlerController
+from core.mavlink.bus import MAVLinkEventBus
+from core.mavlink.consumers.manual_control import ManualControlConsumer
+from core.mavlink.producers.heartbeat import HeartbeatProducer
+from core.realtime import RealtimeControlLoop
+
+CONTROL_RATE = 50  # Hz
+
+
+class RecordingSerial:
+    """Stand-in serial port that records when the throttle servo messages are written."""
+
+    def __init__(self):
+        # (time, servo angle)
+        self.throttle_writes = []
+
+    def write(self, data):
+        if data[0] == pyfirmata2.ANALOG_MESSAGE + config.THROTTLE_PIN:
+            self.throttle_writes.append((time.perf_counter(), data[1] + (data[2] << 7)))
+
+
+class RecordingBoard(pyfirmata2.Board):
+    """Stand-in Arduino with the standard pin layout that writes to a RecordingSerial."""
+
+    def __init__(self, port, serial):
+        self.name = port
+        self.sp = serial
+        self.firmata_version = (2, 5)
+        self._layout = None
+        self.setup_layout(pyfirmata2.BOARDS['arduino'])
+
+    def exit(self):
+        pass
+
+
+def _throttle(seq):
+    """
+    Throttle value whose servo angle is seq % 180, so every write can be traced back
+    to the MANUAL_CONTROL message that caused it.
+    """
+    return round((seq % 180 + 0.5) * 2000 / 180) - 1000
+
+
+def _match(writes, sent):
+    """:return: seq -> time of the first servo write that applied it."""
+    applied = {}
+    for written, angle in writes:
+        # The latest message sent before the write with a matching angle.
+        seq = max((seq for seq, t in sent.items() if seq % 180 == angle and t <= written), default=None)
+        if seq is not None and seq not in applied:
+            applied[seq] = written
+    return applied
+
+
+def _gcs(port, duration, sent):
+    """Stand-in GCS: waits for the crawler heartbeat and then streams MANUAL_CONTROL."""
+    gcs = mavutil.mavlink_connection(f'udpin:127.0.0.1:{port}', source_system=255)
+    gcs.recv_match(type='HEARTBEAT', blocking=True, timeout=5)
+    period = 1.0 / CONTROL_RATE
+    next_send = time.perf_counter()
+    for seq in range(int(duration * CONTROL_RATE)):
+        sent[seq] = time.perf_counter()
+        gcs.mav.manual_control_send(1, 0, 0, _throttle(seq), 0, 0)
+        next_send += period
+        time.sleep(max(0.0, next_send - time.perf_counter()))
+    gcs.close()
+
+
+async def _background_load(stop):
+    """Mimics housekeeping on the event loop: blocking calls and subprocess spawning."""
+    async def blocking_work():
+        while not stop.is_set():
+            deadline = time.perf_counter() + 0.004
+            while time.perf_counter() < deadline:
+                pass
+            await asyncio.sleep(0.02)
+
+    async def spawn_subprocesses():
+        while not stop.is_set():
+            proc = await asyncio.create_subprocess_exec("true")
+            await proc.wait()
+            await asyncio.sleep(0.1)
+
+    await asyncio.gather(blocking_work(), spawn_subprocesses())
+
+
+async def _run(realtime, duration, port):
+    bus = MAVLinkEventBus()
+    serial = RecordingSerial()
+    pyfirmata2.Arduino = lambda port: RecordingBoard(port, serial)
+    controller = CrawlerController()
+    if realtime:
+        control = RealtimeControlLoop(bus, controller)
+    else:
+        control = ManualControlConsumer(bus, controller)
+
+    sent, stop = {}, asyncio.Event()
+    gcs_thread = threading.Thread(target=_gcs, args=(port, duration, sent), daemon=True)
+    gcs_thread.start()
+
+    tasks = [bus.start(), control.start(), HeartbeatProducer(bus).start()]
+    tasks.append(asyncio.create_task(_background_load(stop)))
+    await asyncio.get_running_loop().run_in_executor(None, gcs_thread.join)
+    await asyncio.sleep(0.2)
+
+    stop.set()
+    bus.get_shutdown_event().set()
+    for task in tasks:
+        if task:
+            task.cancel()
+    await asyncio.gather(*[t for t in tasks if t], return_exceptions=True)
+    if realtime:
+        control.close()
+    bus.close()
+    controller.close()
+
+    applied = _match(serial.throttle_writes, sent)
+    return [(applied[seq] - sent[seq]) * 1000 for seq in sent if seq in applied], len(sent)
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    args = sys.argv[1:]
+    duration = float(args[0]) if args and not args[0].startswith("--") else 10.0
+    if "--fifo" in args:
+        config.CONTROL_THREAD_FIFO_PRIORITY = int(args[args.index("--fifo") + 1])
+
+    config.GROUND_CONTROL_STATION_IP = "127.0.0.1"
+    print(f"{duration:.0f}s of MANUAL_CONTROL at {CONTROL_RATE}Hz with background load on the event loop")
+    for name, realtime in (("event loop", False), ("real-time thread", True)):
+        config.MAVLINK_PORT = _free_port()
+        latencies, sent = asyncio.run(_run(realtime, duration, config.MAVLINK_PORT))
+        latencies.sort()
+        print(f"{name:<17} applied={len(latencies)}/{sent} "
+              f"mean={statistics.mean(latencies):6.2f}ms "
+              f"p50={latencies[len(latencies) // 2]:6.2f}ms "
+              f"p99={latencies[int(len(latencies) * 0.99) - 1]:6.2f}ms "
+              f"max={latencies[-1]:6.2f}ms "
+              f"jitter(stdev)={statistics.pstdev(latencies):6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
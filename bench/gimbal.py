@@ -0,0 +1,170 @@
+"""
+Drives the gimbal consumer through the real MAVLink bus with a stand-in GCS and
+records the servo writes. Each phase reports what reached the servos:
+
+  step      - DO_MOUNT_CONTROL to the range limits; the slew rate must stay within
+              GIMBAL_MAX_RATE and the output must land exactly on the target
+  jitter    - GIMBAL_MANAGER_SET_PITCHYAW at 100 Hz with noise below GIMBAL_DEADBAND;
+              no servo writes are expected
+  foreign   - DO_MOUNT_CONTROL addressed to another system; the gimbal must not
+              move and must not acknowledge it
+
+Usage: python -m bench.gimbal
+"""
+import asyncio
+import math
+import random
+import socket
+import threading
+import time
+
+from pymavlink import mavutil
+
+from core import config
+from core.crawler import CrawlerController
+from core.mavlink.bus import MAVLinkEventBus
+from core.mavlink.consumers.gimbal import GimbalConsumer
+from core.mavlink.producers.heartbeat import HeartbeatProducer
+
+JITTER_RATE = 100  # Hz
+PHASE_DURATION = 2.0  # seconds
+
+
+class RecordingController(CrawlerController):
+    """CrawlerController without a board that records the gimbal servo writes."""
+
+    def __init__(self):
+        super().__init__()
+        # (time, pin number, servo angle)
+        self.writes = []
+
+    def attach_servo(self, pin_number, min_pulse, max_pulse):
+        return pin_number
+
+    async def write_servos(self, angles):
+        now = time.monotonic()
+        self.writes += [(now, pin, angle) for pin, angle in angles]
+
+
+class Gcs:
+    """Stand-in GCS that sends the gimbal commands and collects the COMMAND_ACKs."""
+
+    def __init__(self, port):
+        self._connection = mavutil.mavlink_connection(f'udpin:127.0.0.1:{port}', source_system=255)
+        self.acks = []
+        self._stop = threading.Event()
+        self._connection.recv_match(type='HEARTBEAT', blocking=True, timeout=5)
+        self._thread = threading.Thread(target=self._receive, daemon=True)
+        self._thread.start()
+
+    def _receive(self):
+        while not self._stop.is_set():
+            msg = self._connection.recv_match(type='COMMAND_ACK', blocking=True, timeout=0.1)
+            if msg:
+                self.acks.append(msg)
+
+    def mount_control(self, pitch, roll, yaw, target_system=1):
+        self._connection.mav.command_long_send(
+            target_system, config.MAVLINK_SOURCE_COMPONENT, mavutil.mavlink.MAV_CMD_DO_MOUNT_CONTROL, 0,
+            pitch, roll, yaw, 0, 0, 0, 0
+        )
+
+    def pitchyaw(self, pitch, yaw):
+        self._connection.mav.gimbal_manager_set_pitchyaw_send(
+            1, config.MAVLINK_SOURCE_COMPONENT, 0, 0, math.radians(pitch), math.radians(yaw), math.nan, math.nan
+        )
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self._connection.close()
+
+
+def _positions(writes, pin, limit, start, end):
+    """(time, axis angle in degrees) of the writes to one pin within [start, end)."""
+    return [(t, (angle - 90) / 90 * limit) for t, p, angle in writes if p == pin and start <= t < end]
+
+
+def _max_rate(positions):
+    rates = [abs(b - a) / (tb - ta) for (ta, a), (tb, b) in zip(positions, positions[1:]) if tb > ta]
+    return max(rates, default=0.0)
+
+
+async def _run():
+    controller = RecordingController()
+    bus = MAVLinkEventBus()
+    gimbal = GimbalConsumer(bus, controller)
+    tasks = [bus.start(), HeartbeatProducer(bus).start(), gimbal.start()]
+    loop = asyncio.get_running_loop()
+    gcs = await loop.run_in_executor(None, Gcs, config.MAVLINK_PORT)
+    phases = {}
+
+    started = time.monotonic()
+    gcs.mount_control(config.GIMBAL_PITCH_RANGE, -config.GIMBAL_ROLL_RANGE, config.GIMBAL_YAW_RANGE)
+    await asyncio.sleep(PHASE_DURATION)
+    phases["step"] = (started, time.monotonic())
+
+    started = time.monotonic()
+    noise = random.Random(1)
+    while time.monotonic() - started < PHASE_DURATION:
+        jitter = (noise.random() - 0.5) * config.GIMBAL_DEADBAND * 0.8
+        gcs.pitchyaw(config.GIMBAL_PITCH_RANGE + jitter, config.GIMBAL_YAW_RANGE + jitter)
+        await asyncio.sleep(1 / JITTER_RATE)
+    phases["jitter"] = (started, time.monotonic())
+
+    acks = len(gcs.acks)
+    started = time.monotonic()
+    gcs.mount_control(0, 0, 0, target_system=config.MAVLINK_SOURCE_SYSTEM + 1)
+    await asyncio.sleep(PHASE_DURATION / 2)
+    phases["foreign"] = (started, time.monotonic())
+    foreign_acks = len(gcs.acks) - acks
+
+    bus.get_shutdown_event().set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    gcs.close()
+    bus.close()
+    controller.close()
+    return controller.writes, phases, gcs.acks, foreign_acks
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    config.GROUND_CONTROL_STATION_IP = "127.0.0.1"
+    config.MAVLINK_PORT = _free_port()
+    config.ARDUINO_PORT = "/dev/null-crawler-bench"
+
+    writes, phases, acks, foreign_acks = asyncio.run(_run())
+
+    print(f"GIMBAL_MAX_RATE={config.GIMBAL_MAX_RATE:.0f}deg/s at {config.GIMBAL_OUTPUT_RATE}Hz, "
+          f"GIMBAL_DEADBAND={config.GIMBAL_DEADBAND}deg")
+    for axis, pin, limit, target in (
+        ("pitch", config.GIMBAL_PITCH_PIN, config.GIMBAL_PITCH_RANGE, config.GIMBAL_PITCH_RANGE),
+        ("roll", config.GIMBAL_ROLL_PIN, config.GIMBAL_ROLL_RANGE, -config.GIMBAL_ROLL_RANGE),
+        ("yaw", config.GIMBAL_YAW_PIN, config.GIMBAL_YAW_RANGE, config.GIMBAL_YAW_RANGE),
+    ):
+        step = _positions(writes, pin, limit, *phases["step"])
+        final = step[-1][1] if step else float("nan")
+        settled = next((t for t, position in step if position == target), None)
+        print(f"step     {axis:<5} writes={len(step):3d} max rate={_max_rate(step):6.1f}deg/s "
+              f"final={final:6.1f}deg (target {target:.1f}) "
+              f"settled after {(settled - phases['step'][0]) * 1000 if settled else float('nan'):4.0f}ms")
+
+    jitter = sum(len(_positions(writes, pin, 1, *phases["jitter"]))
+                 for pin in (config.GIMBAL_PITCH_PIN, config.GIMBAL_YAW_PIN))
+    commands = int(PHASE_DURATION * JITTER_RATE)
+    print(f"jitter   {commands} commands, {jitter} servo writes")
+    foreign = sum(len(_positions(writes, pin, 1, *phases["foreign"]))
+                  for pin in (config.GIMBAL_ROLL_PIN, config.GIMBAL_PITCH_PIN, config.GIMBAL_YAW_PIN))
+    print(f"foreign  {foreign} servo writes, {foreign_acks} acks")
+    print(f"acks     {len(acks)} total, results {sorted({ack.result for ack in acks})}")
+
+
+if __name__ == "__main__":
+    main()
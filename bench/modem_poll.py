@@ -0,0 +1,122 @@
+"""
+Measures the cost of polling the 4G dongle web API against a local stand-in
+HiLink server. ModemMonitor runs as in the crawler, and every snapshot it publishes
+through get_metrics() is sampled. Compares the persistent connection it keeps with
+a server that closes the connection after every request.
+
+Usage: python -m bench.modem_poll [polls]
+"""
+import asyncio
+import sys
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from core import config
+from core.modem import HiLinkClient, ModemMonitor
+
+# Seconds between reads of the published metrics.
+_SAMPLE_INTERVAL = 0.0005
+
+_RESPONSES = {
+    "/api/webserver/SesTokInfo":
+        "<response><SesInfo>SessionID=stub</SesInfo><TokInfo>token</TokInfo></response>",
+    "/api/device/signal":
+        "<response><rssi>-67dBm</rssi><rsrp>-95dBm</rsrp><rsrq>-9dB</rsrq>"
+        "<sinr>12dB</sinr><band>20</band><cell_id>1234567</cell_id></response>",
+    "/api/monitoring/status":
+        "<response><ConnectionStatus>901</ConnectionStatus><SignalIcon>4</SignalIcon>"
+        "<CurrentNetworkType>19</CurrentNetworkType><CurrentNetworkTypeEx>101</CurrentNetworkTypeEx></response>",
+    "/api/monitoring/traffic-statistics":
+        "<response><CurrentDownloadRate>125000</CurrentDownloadRate><CurrentUploadRate>131072</CurrentUploadRate>"
+        "<TotalDownload>123456789</TotalDownload><TotalUpload>987654321</TotalUpload></response>",
+    "/api/net/net-mode":
+        "<response><NetworkMode>03</NetworkMode><NetworkBand>3FFFFFFF</NetworkBand></response>",
+}
+
+
+class StubHiLinkHandler(BaseHTTPRequestHandler):
+    """Serves canned HiLink responses over HTTP/1.1, with keep-alive unless close_connections is set."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    close_connections = False
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        StubHiLinkHandler.connections += 1
+
+    def do_GET(self):
+        body = _RESPONSES.get(self.path, "<error><code>100002</code></error>").encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml")
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connections:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubEventBus:
+    def __init__(self):
+        self._shutdown_event = asyncio.Event()
+
+    def get_shutdown_event(self):
+        return self._shutdown_event
+
+
+async def _collect(polls, host, port):
+    """
+    Runs a ModemMonitor against the stand-in server until it has published the
+    given number of snapshots. :return: The poll durations in ms and the last metrics.
+    """
+    bus = _StubEventBus()
+    monitor = ModemMonitor(bus, client=HiLinkClient(host, port))
+    task = monitor.start()
+    samples = []
+    metrics = monitor.get_metrics()
+    while len(samples) < polls:
+        await asyncio.sleep(_SAMPLE_INTERVAL)
+        latest = monitor.get_metrics()
+        if latest.get("timestamp") != metrics.get("timestamp"):
+            metrics = latest
+            samples.append(metrics["poll_ms"])
+    bus.get_shutdown_event().set()
+    await task
+    return samples, metrics
+
+
+def _measure(name, polls, host, port, close_connections):
+    """Polls the stand-in server and prints latency statistics."""
+    StubHiLinkHandler.connections = 0
+    StubHiLinkHandler.close_connections = close_connections
+    samples, metrics = asyncio.run(_collect(polls, host, port))
+
+    samples.sort()
+    print(f"{name:<22} mean={metrics['poll_avg_ms']:6.2f}ms "
+          f"p95={samples[int(len(samples) * 0.95) - 1]:6.2f}ms "
+          f"max={samples[-1]:6.2f}ms connections={StubHiLinkHandler.connections}")
+    return metrics
+
+
+def main():
+    polls = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHiLinkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    config.MODEM_POLL_INTERVAL = _SAMPLE_INTERVAL * 4
+
+    print(f"Polling stand-in HiLink server at {host}:{port} {polls} times")
+    metrics = _measure("persistent connection", polls, host, port, close_connections=False)
+    _measure("connection per request", polls, host, port, close_connections=True)
+
+    print(f"Sample metrics: {metrics}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Measures the startup cost of the crawler: import time and peak RSS of each module,
+each imported in a fresh interpreter, and the time until the first HEARTBEAT is
+sent by `python -m core.main`. Both are run with the trimmed "crawler" MAVLink
+dialect and with the full ardupilotmega dialect.
+
+No Arduino is needed; the crawler starts without a board. Run it a second time
+for numbers without the .pyc compilation cost.
+
+Usage: python -m bench.startup [runs]
+"""
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+DIALECTS = ("crawler", "ardupilotmega")
+
+MODULES = [
+    "core.mavlink",
+    "core.mavlink.bus",
+    "core.mavlink.consumers.manual_control",
+    "core.realtime",
+    "core.crawler",
+    "core.mavlink.consumers.gimbal",
+    "core.mavlink.producers.gps",
+    "core.mavlink.consumers.parameters",
+    "core.mavlink.producers.link",
+    "core.network",
+    "core.modem",
+    "core.ipc",
+    "core.supervisor",
+    "core.main",
+]
+
+# Executed in a fresh interpreter: imports one module and reports time and peak RSS (KB).
+_IMPORT_PROBE = """
+import importlib, json, resource, sys, time
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+started = time.perf_counter()
+importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - started
+print(json.dumps([elapsed * 1000, base, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss]))
+"""
+
+
+def _environment(dialect, **extra):
+    return dict(os.environ, CRAWLER_MAVLINK_DIALECT=dialect, **extra)
+
+
+def measure_import(module, dialect):
+    """:return: (import ms, peak RSS MB, RSS added by the import in MB)"""
+    output = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE, module],
+        env=_environment(dialect), capture_output=True, text=True, check=True
+    ).stdout
+    elapsed_ms, base_kb, peak_kb = json.loads(output)
+    return elapsed_ms, peak_kb / 1024, (peak_kb - base_kb) / 1024
+
+
+def _peak_rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def measure_first_heartbeat(dialect):
+    """
+    Starts the crawler against a local stand-in GCS socket.
+    :return: (ms from process start to the first datagram, peak RSS MB at that point,
+              peak RSS MB once all components are running)
+    """
+    gcs = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    gcs.bind(("127.0.0.1", 0))
+    gcs.settimeout(30)
+    env = _environment(
+        dialect,
+        CRAWLER_GROUND_CONTROL_STATION_IP="127.0.0.1",
+        CRAWLER_MAVLINK_PORT=str(gcs.getsockname()[1]),
+        CRAWLER_ARDUINO_PORT="/dev/null-crawler-bench",
+        CRAWLER_CONFIG="/nonexistent/crawler.json",
+        CRAWLER_CONTROL_THREAD="0",
+    )
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "core.main"], env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        gcs.recv(1024)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        rss_at_heartbeat = _peak_rss_mb(process.pid)
+        time.sleep(2)
+        rss_running = _peak_rss_mb(process.pid)
+    finally:
+        process.terminate()
+        process.wait()
+        gcs.close()
+    return elapsed_ms, rss_at_heartbeat, rss_running
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    print(f"Import cost per module in a fresh interpreter, median of {runs} runs")
+    print(f"{'module':<40}" + "".join(f"{d + ' ms':>18}{'peak MB':>9}{'+MB':>7}" for d in DIALECTS))
+    for module in MODULES:
+        row = f"{module:<40}"
+        for dialect in DIALECTS:
+            samples = [measure_import(module, dialect) for _ in range(runs)]
+            elapsed, peak, added = (statistics.median(column) for column in zip(*samples))
+            row += f"{elapsed:18.1f}{peak:9.1f}{added:7.1f}"
+        print(row)
+
+    print()
+    print(f"python -m core.main until the first HEARTBEAT, median of {runs} runs")
+    for dialect in DIALECTS:
+        samples = [measure_first_heartbeat(dialect) for _ in range(runs)]
+        elapsed, rss_at_heartbeat, rss_running = (statistics.median(column) for column in zip(*samples))
+        print(f"{dialect:<14} first heartbeat={elapsed:7.1f}ms peak RSS at heartbeat={rss_at_heartbeat:5.1f}MB "
+              f"running={rss_running:5.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
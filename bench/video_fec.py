@@ -0,0 +1,258 @@
+"""
+Runs the video FEC stage against a local lossy link. A synthetic H.264-like RTP
+source (1 Mbps, 48 fps, keyframe every 15 frames, mtu 1200) feeds the real
+VideoFecSender. Its output goes through a stand-in 4G uplink with random loss, a
+rate limited modem buffer that drops packets when it overflows and, in the reord
+scenarios, adjacent packet reordering, then through the real VideoFecReceiver to a
+sink.
+
+For every scenario it reports the loss on the link, how much of it FEC recovered,
+the residual loss, the residual loss as counted by the receiver, the FEC overhead,
+the end to end latency, the extra latency of the recovered packets, and the share
+of frames that can be shown without artifacts (no packet lost since the last
+keyframe).
+
+Usage: python -m bench.video_fec [seconds per scenario] [random loss]
+"""
+import asyncio
+import math
+import random
+import socket
+import struct
+import sys
+import time
+
+from core import config
+from core.mavlink.bus import MAVLinkEventBus
+from core.video.fec import is_rtp, rtp_sequence
+from core.video.receiver import VideoFecReceiver
+from core.video.sender import VideoFecSender
+
+FRAME_RATE = 48
+BITRATE = 1_000_000  # bits/s
+KEYFRAME_INTERVAL = 15
+KEYFRAME_WEIGHT = 8  # keyframe size relative to the other frames
+MTU = 1200
+
+LINK_RATE = 312_500  # bytes/s (2.5 Mbps uplink)
+LINK_BUFFER = 10_000  # bytes queued in the modem before it drops
+LINK_DELAY = 0.03  # seconds
+REORDER = 0.05  # share of packets overtaken by the next one in the reord scenarios
+REORDER_DELAY = 0.005  # seconds a reordered packet is held back
+
+# send time, frame number
+_PAYLOAD = struct.Struct(">dI")
+_RTP = struct.Struct(">BBHII")
+
+SCENARIOS = (
+    # name, parity packets, paced, reordered
+    ("plain", 0, False, False),
+    ("paced", 0, True, False),
+    ("xor", 1, False, False),
+    ("xor+paced", 1, True, False),
+    ("rs2", 2, False, False),
+    ("rs2+paced", 2, True, False),
+    ("xor+reord", 1, True, True),
+    ("rs2+reord", 2, True, True),
+)
+
+
+def _frame_sizes():
+    average = BITRATE / 8 / FRAME_RATE
+    small = average * KEYFRAME_INTERVAL / (KEYFRAME_INTERVAL - 1 + KEYFRAME_WEIGHT)
+    return int(small * KEYFRAME_WEIGHT), int(small)
+
+
+async def _source(port, duration):
+    """Sends one frame worth of RTP packets back to back every frame interval."""
+    keyframe_size, frame_size = _frame_sizes()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    chunk = MTU - _RTP.size
+    seq = 0
+    frames = int(duration * FRAME_RATE)
+    started = time.monotonic()
+    for frame in range(frames):
+        size = keyframe_size if frame % KEYFRAME_INTERVAL == 0 else frame_size
+        count = math.ceil(size / chunk)
+        for i in range(count):
+            marker = 0x80 if i == count - 1 else 0
+            header = _RTP.pack(0x80, marker | 96, seq, frame * 90000 // FRAME_RATE, 0x1234)
+            payload = _PAYLOAD.pack(time.monotonic(), frame)
+            sock.sendto(header + payload.ljust(min(chunk, size - i * chunk), b"\0"), ("127.0.0.1", port))
+            seq = (seq + 1) & 0xffff
+        await asyncio.sleep(max(0.0, started + (frame + 1) / FRAME_RATE - time.monotonic()))
+    sock.close()
+    return frames
+
+
+class LossyLink(asyncio.DatagramProtocol):
+    """
+    Stand-in 4G uplink: a finite buffer drained at LINK_RATE that drops arriving
+    packets when full, random loss, a fixed propagation delay and optional reordering.
+    """
+
+    def __init__(self, destination, loss, reorder, seed=1):
+        self._destination = destination
+        self._loss = loss
+        self._reorder = reorder
+        self._random = random.Random(seed)
+        self._transport = None
+        self._busy_until = 0.0
+        self.sent_bytes = 0
+        self.media_sent = 0
+        self.parity_sent = 0
+        self.dropped = set()
+        self.overflows = 0
+
+    def connection_made(self, transport):
+        self._transport = transport
+
+    def datagram_received(self, data, addr):
+        now = time.monotonic()
+        self.sent_bytes += len(data)
+        media = is_rtp(data)
+        if media:
+            self.media_sent += 1
+        else:
+            self.parity_sent += 1
+
+        queued = max(0.0, self._busy_until - now) * LINK_RATE
+        overflow = queued + len(data) > LINK_BUFFER
+        if overflow or self._random.random() < self._loss:
+            if media:
+                self.dropped.add(rtp_sequence(data))
+                self.overflows += overflow
+            return
+
+        self._busy_until = max(now, self._busy_until) + len(data) / LINK_RATE
+        delay = self._busy_until - now + LINK_DELAY
+        if self._random.random() < self._reorder:
+            delay += REORDER_DELAY
+        asyncio.get_running_loop().call_later(delay, self._transport.sendto, data, self._destination)
+
+
+class Sink(asyncio.DatagramProtocol):
+    """Records the latency of every media packet that reaches the video player."""
+
+    def __init__(self):
+        # seq -> (frame, latency)
+        self.received = {}
+
+    def datagram_received(self, data, addr):
+        sent, frame = _PAYLOAD.unpack_from(data, _RTP.size)
+        self.received[rtp_sequence(data)] = (frame, time.monotonic() - sent)
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def _clean_frames(received, frames, sequences):
+    """Share of frames whose packets, and those of every frame since the keyframe, arrived."""
+    complete = [True] * frames
+    for seq, frame in sequences.items():
+        if seq not in received:
+            complete[frame] = False
+    clean = 0
+    broken = False
+    for frame in range(frames):
+        if frame % KEYFRAME_INTERVAL == 0:
+            broken = False
+        broken = broken or not complete[frame]
+        clean += not broken
+    return clean / frames
+
+
+async def _run(parity, paced, reorder, duration, loss):
+    config.VIDEO_FEC_PARITY = parity
+    config.VIDEO_PACING_RATE = config.VIDEO_PACING_RATE if paced else 1e9
+    loop = asyncio.get_running_loop()
+
+    sink_transport, sink = await loop.create_datagram_endpoint(Sink, local_addr=("127.0.0.1", 0))
+    receiver_transport, receiver = await loop.create_datagram_endpoint(
+        lambda: VideoFecReceiver(sink_transport.get_extra_info("sockname")), local_addr=("127.0.0.1", 0)
+    )
+    link_transport, link = await loop.create_datagram_endpoint(
+        lambda: LossyLink(receiver_transport.get_extra_info("sockname"), loss, REORDER if reorder else 0.0),
+        local_addr=("127.0.0.1", 0)
+    )
+    config.VIDEO_FEC_PORT = link_transport.get_extra_info("sockname")[1]
+    config.VIDEO_FEC_INPUT_PORT = _free_port()
+
+    bus = MAVLinkEventBus()
+    sender = VideoFecSender(bus)
+    task = sender.start()
+    await asyncio.sleep(0.1)
+
+    frames = await _source(config.VIDEO_FEC_INPUT_PORT, duration)
+    await asyncio.sleep(0.5)
+
+    bus.get_shutdown_event().set()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    sender.close()
+    receiver.close()
+    link_transport.close()
+    sink_transport.close()
+    bus.close()
+    return frames, link, sink, receiver.get_stats()
+
+
+def _sequences(frames):
+    """RTP sequence number -> frame number of the synthetic stream."""
+    keyframe_size, frame_size = _frame_sizes()
+    chunk = MTU - _RTP.size
+    sequences = {}
+    seq = 0
+    for frame in range(frames):
+        size = keyframe_size if frame % KEYFRAME_INTERVAL == 0 else frame_size
+        for _ in range(math.ceil(size / chunk)):
+            sequences[seq] = frame
+            seq = (seq + 1) & 0xffff
+    return sequences
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    loss = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+
+    config.GROUND_CONTROL_STATION_IP = "127.0.0.1"
+    config.MAVLINK_PORT = _free_port()
+    config.VIDEO_FEC_STATS_INTERVAL = 3600.0
+    pacing_rate = config.VIDEO_PACING_RATE
+
+    print(f"{BITRATE / 1e6:.1f} Mbps at {FRAME_RATE} fps, link {LINK_RATE * 8 / 1e6:.1f} Mbps with a "
+          f"{LINK_BUFFER} B buffer and {loss * 100:.1f}% random loss, pacing at {pacing_rate * 8 / 1e6:.1f} Mbps, "
+          f"FEC groups of {config.VIDEO_FEC_GROUP_SIZE}, {duration:.0f}s per scenario")
+    print(f"{'scenario':<10} {'wire loss':>9} {'overflow':>8} {'recovered':>9} {'residual':>8} {'counted':>8} "
+          f"{'overhead':>8} "
+          f"{'p50':>7} {'p99':>7} {'recov p50':>9} {'recov p99':>9} {'clean frames':>12}")
+    for name, parity, paced, reorder in SCENARIOS:
+        config.VIDEO_PACING_RATE = pacing_rate
+        frames, link, sink, stats = asyncio.run(_run(parity, paced, reorder, duration, loss))
+        sequences = _sequences(frames)
+        media = len(sequences)
+        lost = len(link.dropped)
+        residual = sum(1 for seq in sequences if seq not in sink.received)
+        latencies = [latency for _, latency in sink.received.values()]
+        recovered = [sink.received[seq][1] for seq in link.dropped if seq in sink.received]
+        print(f"{name:<10} {lost / media * 100:8.2f}% {link.overflows:8d} "
+              f"{(lost - residual) / lost * 100 if lost else 100:8.1f}% {residual / media * 100:7.2f}% "
+              f"{stats['unrecovered'] / media * 100:7.2f}% "
+              f"{link.parity_sent / max(1, link.media_sent) * 100:7.1f}% "
+              f"{_percentile(latencies, 0.5) * 1000:5.1f}ms {_percentile(latencies, 0.99) * 1000:5.1f}ms "
+              f"{_percentile(recovered, 0.5) * 1000:7.1f}ms {_percentile(recovered, 0.99) * 1000:7.1f}ms "
+              f"{_clean_frames(sink.received, frames, sequences) * 100:11.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Exercises the liveness watchdog against a local fake systemd notification socket.
+The real bus, control path and failsafe loop run with a stand-in GCS streaming
+MANUAL_CONTROL. After a healthy period a stall is injected and the time until
+WATCHDOG=trigger is reported:
+
+  loop      - the event loop is blocked, like by a blocking serial write on it
+  consumer  - the servo write of the MANUAL_CONTROL consumer hangs in the executor
+  thread    - the servo write of the real-time control thread hangs
+
+Usage: python -m bench.watchdog [healthy seconds]
+"""
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from pymavlink import mavutil
+
+from core import config
+from core.crawler import CrawlerController
+from core.mavlink.bus import MAVLinkEventBus
+from core.mavlink.consumers.manual_control import ManualControlConsumer
+from core.mavlink.producers.heartbeat import HeartbeatProducer
+from core.realtime import RealtimeControlLoop
+from core.watchdog import LivenessWatchdog
+
+CONTROL_RATE = 50  # Hz
+STALL_DURATION = 2.0  # seconds
+
+
+class FakeNotifySocket:
+    """Records the sd_notify datagrams sent to a local NOTIFY_SOCKET."""
+
+    def __init__(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._directory.name, "notify")
+        self.messages = []
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.bind(self.path)
+        self._socket.settimeout(0.1)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._receive, daemon=True)
+        self._thread.start()
+
+    def _receive(self):
+        while not self._stop.is_set():
+            try:
+                data = self._socket.recv(4096)
+            except socket.timeout:
+                continue
+            for state in data.decode().splitlines():
+                self.messages.append((time.monotonic(), state))
+
+    def first(self, state, after=0.0):
+        """Returns the time of the first matching message sent after the given time."""
+        return next((t for t, s in self.messages if s == state and t >= after), None)
+
+    def count(self, state, start, end):
+        return sum(1 for t, s in self.messages if s == state and start <= t < end)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self._socket.close()
+        self._directory.cleanup()
+
+
+class StallableController(CrawlerController):
+    """CrawlerController without a board whose servo writes can be made to hang."""
+
+    def __init__(self):
+        super().__init__()
+        self.stalled = threading.Event()
+        self.released = threading.Event()
+
+    def _hang(self):
+        if self.stalled.is_set():
+            self.released.wait()
+
+    async def set_steering(self, value):
+        await super().set_steering(value)
+        await asyncio.get_running_loop().run_in_executor(None, self._hang)
+
+    def apply_control(self, steering, throttle):
+        super().apply_control(steering, throttle)
+        self._hang()
+
+
+def _gcs(port, stop):
+    """Stand-in GCS: waits for the crawler heartbeat and then streams MANUAL_CONTROL."""
+    gcs = mavutil.mavlink_connection(f'udpin:127.0.0.1:{port}', source_system=255)
+    gcs.recv_match(type='HEARTBEAT', blocking=True, timeout=5)
+    while not stop.is_set():
+        gcs.mav.manual_control_send(1, 0, 0, 500, 0, 0)
+        time.sleep(1.0 / CONTROL_RATE)
+    gcs.close()
+
+
+async def _run(scenario, healthy):
+    started = time.monotonic()
+    controller = StallableController()
+    bus = MAVLinkEventBus()
+    if scenario == "thread":
+        control = RealtimeControlLoop(bus, controller)
+    else:
+        control = ManualControlConsumer(bus, controller)
+    watchdog = LivenessWatchdog(bus, {
+        "bus": bus.get_progress,
+        "control": control.get_progress,
+        "failsafe": controller.get_progress,
+    })
+
+    stop = threading.Event()
+    gcs_thread = threading.Thread(target=_gcs, args=(config.MAVLINK_PORT, stop), daemon=True)
+    gcs_thread.start()
+    tasks = [controller.start(), bus.start(), HeartbeatProducer(bus).start(), control.start()]
+    watchdog.start()
+
+    await asyncio.sleep(healthy)
+    stall_started = time.monotonic()
+    if scenario == "loop":
+        time.sleep(STALL_DURATION)
+    else:
+        controller.stalled.set()
+        await asyncio.sleep(STALL_DURATION)
+        controller.released.set()
+
+    stop.set()
+    bus.get_shutdown_event().set()
+    for task in tasks:
+        if task:
+            task.cancel()
+    await asyncio.gather(*[t for t in tasks if t], return_exceptions=True)
+    watchdog.close()
+    if scenario == "thread":
+        control.close()
+    bus.close()
+    gcs_thread.join()
+    return started, stall_started
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    healthy = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    watchdog_usec = 1_000_000
+
+    config.GROUND_CONTROL_STATION_IP = "127.0.0.1"
+    config.ARDUINO_PORT = "/dev/null-crawler-bench"
+    os.environ["WATCHDOG_USEC"] = str(watchdog_usec)
+
+    print(f"WatchdogSec={watchdog_usec / 1e6:.1f}s, stall timeout={config.WATCHDOG_STALL_TIMEOUT * 1000:.0f}ms, "
+          f"{healthy:.0f}s healthy then a {STALL_DURATION:.0f}s stall")
+    for scenario in ("loop", "consumer", "thread"):
+        notify = FakeNotifySocket()
+        os.environ["NOTIFY_SOCKET"] = notify.path
+        config.MAVLINK_PORT = _free_port()
+        started, stall_started = asyncio.run(_run(scenario, healthy))
+        notify.close()
+
+        ready = notify.first("READY=1")
+        trigger = notify.first("WATCHDOG=trigger")
+        false_triggers = notify.count("WATCHDOG=trigger", 0, stall_started)
+        pings = notify.count("WATCHDOG=1", started, stall_started)
+        print(f"{scenario:<9} ready={(ready - started) * 1000 if ready else float('nan'):6.1f}ms "
+              f"pings={pings} false_triggers={false_triggers} "
+              f"pings_after_stall={notify.count('WATCHDOG=1', stall_started, stall_started + STALL_DURATION)} "
+              f"trigger={(trigger - stall_started) * 1000 if trigger else float('nan'):6.1f}ms after the stall")
+
+
+if __name__ == "__main__":
+    main()
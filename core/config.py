@@ -1,9 +1,15 @@
 """
 Configuration settings for the FPV Crawler.
+These are the defaults. They can be overridden at runtime through the file in
+CONFIG_FILE and CRAWLER_<NAME> environment variables, see core/settings.py.
 """
 
 import os
 
+# -- Runtime Config Overrides
+CONFIG_FILE = os.getenv("CRAWLER_CONFIG", os.path.join(os.path.dirname(os.path.dirname(__file__)), "crawler.json"))
+CONFIG_WATCH_INTERVAL = 1.0  # seconds
+
 # -- Arduino/Firmata Settings
 ARDUINO_PORT = "/dev/serial0"
 
@@ -18,14 +24,50 @@ THROTTLE_MIN_PULSE = 1000  # in microseconds
 THROTTLE_MAX_PULSE = 2000  # in microseconds
 THROTTLE_FAILSAFE_PULSE = 1500  # in microseconds
 
+# -- Camera Gimbal Settings
+# Servo pins per axis, None if the axis is not connected.
+GIMBAL_ROLL_PIN = 11
+GIMBAL_PITCH_PIN = 10
+GIMBAL_YAW_PIN = 9
+GIMBAL_MIN_PULSE = 1000  # in microseconds
+GIMBAL_MAX_PULSE = 2000  # in microseconds
+# Travel in degrees from center to either end of the servo pulse range
+GIMBAL_ROLL_RANGE = 30.0
+GIMBAL_PITCH_RANGE = 45.0
+GIMBAL_YAW_RANGE = 90.0
+GIMBAL_MAX_RATE = 120.0  # deg/s, slew-rate limit of the servo output
+GIMBAL_MANUAL_RATE = 90.0  # deg/s at full deflection of a rate command
+GIMBAL_OUTPUT_RATE = 50  # Hz, servo update rate
+GIMBAL_DEADBAND = 0.5  # degrees, smaller position changes are not written
+# MANUAL_CONTROL aux axis (1-6) mapped to the gimbal position, 0 to disable
+GIMBAL_AUX_YAW = 1
+GIMBAL_AUX_PITCH = 2
+
 FAILSAFE_INTERVAL = 2  # seconds
 FAILSAFE_LOOP_INTERVAL = 0.2  # seconds
 
+# -- Real-time Control Thread
+# Runs MAVLink receive and servo writes on a dedicated thread instead of the event loop.
+CONTROL_THREAD_ENABLED = os.getenv("CRAWLER_CONTROL_THREAD", "0") == "1"
+CONTROL_THREAD_CPU = 3  # CPU core to pin the control thread to, None to disable pinning
+CONTROL_THREAD_FIFO_PRIORITY = 0  # SCHED_FIFO priority (1-99), 0 keeps the default scheduler
+CONTROL_THREAD_RECV_TIMEOUT = 0.1  # seconds
+CONTROL_THREAD_INBOX_SIZE = 256  # messages buffered for the event bus
+
+# -- Liveness Watchdog
+# Pings the systemd watchdog (WatchdogSec in the service unit) only while the MAVLink bus,
+# the control consumer/thread and the failsafe loop make progress, and fires it on a stall.
+WATCHDOG_STALL_TIMEOUT = 0.5  # seconds without progress before the control path counts as stalled
+WATCHDOG_CHECK_INTERVAL = 0.05  # seconds
+
 # -- MAVLink Settings
 GROUND_CONTROL_STATION_IP = os.getenv("CRAWLER_GCS_IP", "192.168.1.111")
 MAVLINK_PORT = 14550
 MAVLINK_SOURCE_SYSTEM = 1
 MAVLINK_SOURCE_COMPONENT = 1
+# "crawler" is the trimmed dialect in core/mavlink/dialect. Any pymavlink dialect
+# name (e.g. "ardupilotmega") can be used instead. Read before pymavlink is imported.
+MAVLINK_DIALECT = os.getenv("CRAWLER_MAVLINK_DIALECT", "crawler")
 
 # -- Mock GPS Location
 MOCK_LAT = 42.645953
@@ -37,19 +79,60 @@ MAVLINK_RECV_LOOP_SLEEP = 0.01
 MAVLINK_SEND_LOOP_SLEEP = 0.1
 MAVLINK_MONITOR_LOOP_SLEEP = 1.0
 GPS_LOOP_SLEEP = 5.0
+LINK_METRICS_LOOP_SLEEP = 1.0
 VIDEO_MANAGER_LOOP_SLEEP = 0.25
 ERROR_LOOP_SLEEP = 1.0 # Sleep duration after an error in a component loop
 
 # -- Logging Settings
 LOG_LEVEL = "INFO" # Options: DEBUG, INFO, WARNING, ERROR, CRITICAL
+LOG_QUEUE_SIZE = 1000  # records buffered for the background writer, extra records are dropped
+LOG_REPEAT_WINDOW = 30.0  # seconds an identical message is suppressed for, 0 to disable
 
 # -- Video Service Settings
 VIDEO_SERVICE_NAME = "crawler-video.service"
 GCS_HEARTBEAT_TIMEOUT = 5.0 # Seconds before GCS is considered disconnected
 
+# -- Video FEC / Pacing
+# With VIDEO_FEC_ENABLED the video pipeline (deploy/crawler-video-fec.service) sends RTP to
+# VIDEO_FEC_INPUT_PORT on localhost and the crawler forwards it with FEC parity to the GCS,
+# where `python -m core.video.receiver` restores the stream for QGC.
+VIDEO_FEC_ENABLED = False
+VIDEO_FEC_INPUT_PORT = 5004
+VIDEO_FEC_PORT = 5002  # GCS port of the FEC receiver
+VIDEO_FEC_GROUP_SIZE = 8  # media packets per FEC group
+VIDEO_FEC_PARITY = 1  # parity packets per group: 0 = pacing only, 1 = XOR, more = Reed-Solomon
+# Seconds a group may stay open waiting for packets. Groups span frames, so the overhead is
+# about VIDEO_FEC_PARITY / VIDEO_FEC_GROUP_SIZE when the stream fills a group within this
+# delay. Groups closed by it get fewer parity packets, but at least one: at 1 Mbps (about 100
+# packets/s) a 50ms group holds about 5 packets, so XOR costs about 20% instead of 12.5%.
+VIDEO_FEC_GROUP_DELAY = 0.05
+VIDEO_PACING_RATE = 250000  # bytes/s, keep above the encoder bitrate plus FEC overhead
+VIDEO_PACING_BURST = 4800  # bytes sent back to back before pacing starts, keep below the modem buffer
+VIDEO_PACING_QUEUE_SIZE = 256  # packets waiting for pacing, the oldest are dropped
+VIDEO_FEC_STATS_INTERVAL = 60.0  # seconds
+
 
 # -- Network connectivity settings
 WIREGUARD_CONNECTION = "wg0"
 DONGLE_INTERFACE_ADDRESS = "192.168.8.100"
 HOME_NETWORK_INTERFACE_PREFIX = "192.168.1."
 CONNECTIVITY_CHECK_IP = "8.8.8.8"
+
+# -- 4G dongle (HiLink web API) settings
+MODEM_ADDRESS = os.getenv("CRAWLER_MODEM_ADDRESS", "192.168.8.1")
+MODEM_PORT = 80
+MODEM_HTTP_TIMEOUT = 1.0  # seconds
+MODEM_POLL_INTERVAL = 2.0  # seconds
+
+# -- Supervisor Mode Settings
+# Runtime directory (tmpfs) for the shared state block and the IPC sockets
+SUPERVISOR_RUNTIME_DIR = os.getenv("XDG_RUNTIME_DIR", "/tmp")
+SHARED_STATE_FILE = "fpv_crawler_state"
+SUPERVISOR_CONTROL_SOCKET = "fpv_crawler_control.sock"
+SUPERVISOR_HOUSEKEEPING_SOCKET = "fpv_crawler_housekeeping.sock"
+# The control process sends its systemd notifications here; the supervisor relays them
+SUPERVISOR_NOTIFY_SOCKET = "fpv_crawler_notify.sock"
+SHARED_STATE_LOOP_SLEEP = 0.2  # seconds
+SUPERVISOR_STALE_TIMEOUT = 5.0  # Seconds without a heartbeat before a process is restarted
+SUPERVISOR_STARTUP_TIMEOUT = 30.0  # Seconds a new process has to publish its first heartbeat
+SUPERVISOR_RESTART_DELAY = 2.0  # seconds
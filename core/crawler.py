@@ -4,9 +4,13 @@ for controlling servos.
 """
 import asyncio
 import logging
+import threading
+import time
+
 import pyfirmata2
 
 from core import config
+from core.settings import config_manager
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +26,12 @@ class CrawlerController:
         """
         self._last_command_time = -1
         self._task = None
+        self._loop_count = 0
+        # Serializes Firmata writes coming from the event loop, the executor and the control thread.
+        self._write_lock = threading.Lock()
+        # The pins are only read at startup, a changed pin config needs a restart.
+        self._steering_pin_number = config.STEERING_PIN
+        self._throttle_pin_number = config.THROTTLE_PIN
 
         logger.info(f"Connecting to Arduino on port {config.ARDUINO_PORT}...")
         try:
@@ -33,27 +43,63 @@ class CrawlerController:
             return
 
         # Get pin objects
-        self._steering_pin = self._board.get_pin(f'd:{config.STEERING_PIN}:s')
-        self._throttle_pin = self._board.get_pin(f'd:{config.THROTTLE_PIN}:s')
+        self._steering_pin = self._board.get_pin(f'd:{self._steering_pin_number}:s')
+        self._throttle_pin = self._board.get_pin(f'd:{self._throttle_pin_number}:s')
 
         # Configure servo pulse widths
-        self._board.servo_config(config.STEERING_PIN, min_pulse=config.STEERING_MIN_PULSE, max_pulse=config.STEERING_MAX_PULSE)
-        self._board.servo_config(config.THROTTLE_PIN, min_pulse=config.THROTTLE_MIN_PULSE, max_pulse=config.THROTTLE_MAX_PULSE)
-        logger.info(f"Steering servo on pin {config.STEERING_PIN} configured for {config.STEERING_MIN_PULSE}-{config.STEERING_MAX_PULSE}us.")
-        logger.info(f"Throttle servo on pin {config.THROTTLE_PIN} configured for {config.THROTTLE_MIN_PULSE}-{config.THROTTLE_MAX_PULSE}us.")
+        self._configure_servos(keep_position=False)
+        config_manager.subscribe(
+            ["STEERING_MIN_PULSE", "STEERING_MAX_PULSE", "THROTTLE_MIN_PULSE", "THROTTLE_MAX_PULSE"],
+            lambda changes: self._configure_servos()
+        )
 
         # Set initial failsafe state
         self._set_servos_failsafe()
 
+    def _configure_servos(self, keep_position=True):
+        """
+        Configures the servo pulse widths from the current config.
+        servo_config() also writes an angle: the servos either keep their last
+        position (live reconfiguration), re-sent so it maps to the new range, or are
+        moved to failsafe (startup).
+        """
+        steering_angle, throttle_angle = self._failsafe_angles()
+        if keep_position:
+            steering_angle, throttle_angle = self._steering_pin.value, self._throttle_pin.value
+        with self._write_lock:
+            # Pin.write() skips the value the pin already has, clear it to force the write.
+            self._steering_pin.value = None
+            self._throttle_pin.value = None
+            self._board.servo_config(
+                self._steering_pin_number, min_pulse=config.STEERING_MIN_PULSE, max_pulse=config.STEERING_MAX_PULSE,
+                angle=steering_angle
+            )
+            self._board.servo_config(
+                self._throttle_pin_number, min_pulse=config.THROTTLE_MIN_PULSE, max_pulse=config.THROTTLE_MAX_PULSE,
+                angle=throttle_angle
+            )
+        logger.info(f"Steering servo on pin {self._steering_pin_number} configured for {config.STEERING_MIN_PULSE}-{config.STEERING_MAX_PULSE}us.")
+        logger.info(f"Throttle servo on pin {self._throttle_pin_number} configured for {config.THROTTLE_MIN_PULSE}-{config.THROTTLE_MAX_PULSE}us.")
+
     def _map_value(self, value, in_min, in_max, out_min, out_max):
         """Maps a value from one range to another."""
         return (value - in_min) * (out_max - out_min) / (in_max - in_min) + out_min
 
-    def _set_servos_failsafe(self):
-        """Writes the failsafe values to the servos."""
-        if not self._board:
-            return
+    def get_progress(self):
+        """Returns the number of failsafe loop iterations, for the liveness watchdog."""
+        return self._loop_count
+
+    def is_failsafe_active(self):
+        """Returns True while the servos are held at their failsafe positions."""
+        return self._last_command_time <= 0
 
+    def _write_pin(self, pin, angle):
+        """Writes an angle to a servo pin. Safe to call from any thread."""
+        with self._write_lock:
+            pin.write(angle)
+
+    def _failsafe_angles(self):
+        """Returns the (steering, throttle) failsafe angles."""
         steering_failsafe_angle = self._map_value(
             config.STEERING_FAILSAFE_PULSE,
             config.STEERING_MIN_PULSE,
@@ -68,14 +114,24 @@ class CrawlerController:
             0,
             180
         )
-        self._steering_pin.write(steering_failsafe_angle)
-        self._throttle_pin.write(throttle_failsafe_angle)
+        return steering_failsafe_angle, throttle_failsafe_angle
+
+    def _set_servos_failsafe(self):
+        """Writes the failsafe values to the servos."""
+        if not self._board:
+            return
+
+        steering_failsafe_angle, throttle_failsafe_angle = self._failsafe_angles()
+        with self._write_lock:
+            self._steering_pin.write(steering_failsafe_angle)
+            self._throttle_pin.write(throttle_failsafe_angle)
 
     async def run(self):
         """
         Monitors for command timeout and engages failsafe if necessary.
         """
         while True:
+            self._loop_count += 1
             now = asyncio.get_running_loop().time()
 
             # A real command time is > 0.
@@ -107,7 +163,7 @@ class CrawlerController:
 
         angle = self._map_value(value, -1000, 1000, 0, 180)
         loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, self._steering_pin.write, angle)
+        await loop.run_in_executor(None, self._write_pin, self._steering_pin, angle)
 
     async def set_throttle(self, value):
         """
@@ -120,7 +176,67 @@ class CrawlerController:
 
         angle = self._map_value(value, -1000, 1000, 0, 180)
         loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, self._throttle_pin.write, angle)
+        await loop.run_in_executor(None, self._write_pin, self._throttle_pin, angle)
+
+    def apply_control(self, steering, throttle):
+        """
+        Sets both servos from raw controller values in a single blocking call.
+        Intended for the real-time control thread, where there is no event loop.
+        The command time uses the same monotonic clock as the asyncio loop.
+        :param steering: The steering controller value (-1000 to 1000).
+        :param throttle: The throttle controller value (-1000 to 1000).
+        """
+        self._last_command_time = time.monotonic()
+        if not self._board:
+            return
+
+        steering_angle = self._map_value(steering, -1000, 1000, 0, 180)
+        throttle_angle = self._map_value(throttle, -1000, 1000, 0, 180)
+        with self._write_lock:
+            self._steering_pin.write(steering_angle)
+            self._throttle_pin.write(throttle_angle)
+
+    def attach_servo(self, pin_number, min_pulse, max_pulse):
+        """
+        Configures an additional servo output, e.g. for the camera gimbal.
+        :return: The pin object to pass to write_servos(), or None if there is no board.
+        """
+        if not self._board:
+            return None
+
+        with self._write_lock:
+            pin = self._board.get_pin(f'd:{pin_number}:s')
+            self._board.servo_config(pin_number, min_pulse=min_pulse, max_pulse=max_pulse, angle=90)
+        logger.info(f"Servo on pin {pin_number} configured for {min_pulse}-{max_pulse}us.")
+        return pin
+
+    def configure_servo(self, pin_number, min_pulse, max_pulse):
+        """Updates the pulse range of an attached servo."""
+        if not self._board:
+            return
+
+        with self._write_lock:
+            # Keep the servo at its last position, servo_config() also writes an angle.
+            # Pin.write() skips the value the pin already has, clear it to force the write.
+            pin = self._board.digital[pin_number]
+            angle, pin.value = pin.value, None
+            self._board.servo_config(pin_number, min_pulse=min_pulse, max_pulse=max_pulse, angle=angle)
+
+    async def write_servos(self, angles):
+        """
+        Writes several servo angles in a single executor call. This is a non-blocking coroutine.
+        :param angles: List of (pin, angle) tuples, angles in the 0-180 servo range.
+        """
+        if not self._board or not angles:
+            return
+
+        def write():
+            with self._write_lock:
+                for pin, angle in angles:
+                    pin.write(angle)
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, write)
 
     def start(self):
         """Starts the failsafe monitoring task."""
@@ -0,0 +1,209 @@
+"""
+IPC channel between the control and the housekeeping processes in supervisor mode.
+Raw MAVLink frames are exchanged over connectionless UNIX datagram sockets, so
+either process can be restarted without the other noticing.
+"""
+import asyncio
+import logging
+import os
+import socket
+
+from core import config
+from core.mavlink.dialect import mavlink
+
+logger = logging.getLogger(__name__)
+
+# Message types that the control process forwards to the housekeeping process.
+HOUSEKEEPING_MSG_TYPES = ['HEARTBEAT', 'PARAM_REQUEST_LIST', 'PARAM_SET', 'PARAM_REQUEST_READ']
+
+_MAX_DATAGRAM = 4096
+
+
+def _socket_path(name):
+    return os.path.join(config.SUPERVISOR_RUNTIME_DIR, name)
+
+
+class DatagramChannel:
+    """
+    A UNIX datagram socket bound to a local path and sending to a peer path.
+    Frames sent while the peer is not running are dropped.
+    """
+
+    def __init__(self, local_name, peer_name):
+        self._local_path = _socket_path(local_name)
+        self._peer_path = _socket_path(peer_name)
+        self._peer_available = True
+
+        try:
+            os.unlink(self._local_path)
+        except FileNotFoundError:
+            pass
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.bind(self._local_path)
+        self._socket.setblocking(False)
+
+    def send(self, data):
+        """Sends a frame to the peer without blocking."""
+        try:
+            self._socket.sendto(data, self._peer_path)
+            if not self._peer_available:
+                logger.info(f"IPC peer {self._peer_path} is available.")
+                self._peer_available = True
+        except (FileNotFoundError, ConnectionRefusedError, BlockingIOError):
+            if self._peer_available:
+                logger.warning(f"IPC peer {self._peer_path} is not available. Dropping frames.")
+                self._peer_available = False
+
+    async def recv(self):
+        """Waits for the next frame from the peer."""
+        return await asyncio.get_running_loop().sock_recv(self._socket, _MAX_DATAGRAM)
+
+    def close(self):
+        """Closes the socket and removes its path."""
+        self._socket.close()
+        try:
+            os.unlink(self._local_path)
+        except FileNotFoundError:
+            pass
+
+
+class HousekeepingBridge:
+    """
+    Runs in the control process. Forwards housekeeping related MAVLink messages
+    to the housekeeping process and writes its replies to the GCS connection.
+    """
+
+    def __init__(self, event_bus):
+        self._connection = event_bus.get_connection()
+        self._shutdown_event = event_bus.get_shutdown_event()
+        self._internal_queue = asyncio.Queue()
+        self._task = None
+        self._channel = DatagramChannel(config.SUPERVISOR_CONTROL_SOCKET, config.SUPERVISOR_HOUSEKEEPING_SOCKET)
+        # Only decodes the relayed frames, they are re-sent through the GCS connection.
+        self._parser = mavlink.MAVLink(None)
+        self._parser.robust_parsing = True
+
+        for msg_type in HOUSEKEEPING_MSG_TYPES:
+            event_bus.subscribe(msg_type, self._internal_queue)
+
+    async def _forward_to_housekeeping(self):
+        while not self._shutdown_event.is_set():
+            try:
+                msg = await self._internal_queue.get()
+                self._channel.send(msg.get_msgbuf())
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.exception("Error forwarding MAVLink to housekeeping:")
+
+    async def _forward_to_gcs(self):
+        while not self._shutdown_event.is_set():
+            try:
+                # Re-encoding gives the relayed messages the sequence numbers of the
+                # GCS connection, so the GCS does not see gaps and report packet loss.
+                for msg in self._parser.parse_buffer(await self._channel.recv()) or []:
+                    self._connection.mav.send(msg)
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.exception("Error forwarding MAVLink to GCS:")
+                await asyncio.sleep(config.ERROR_LOOP_SLEEP)
+
+    async def run(self):
+        """Runs both forwarding directions."""
+        logger.info("Housekeeping bridge started.")
+        await asyncio.gather(self._forward_to_housekeeping(), self._forward_to_gcs())
+        logger.info("Housekeeping bridge stopped.")
+
+    def start(self):
+        """Starts the bridge as an asyncio task."""
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def close(self):
+        """Closes the IPC socket."""
+        self._channel.close()
+
+
+class _RemoteConnection:
+    """
+    Stands in for the pymavlink connection in the housekeeping process. Messages
+    sent through its 'mav' attribute are encoded locally and relayed by the bridge.
+    """
+
+    def __init__(self, channel):
+        self._channel = channel
+        self.mav = mavlink.MAVLink(
+            self,
+            srcSystem=config.MAVLINK_SOURCE_SYSTEM,
+            srcComponent=config.MAVLINK_SOURCE_COMPONENT
+        )
+        self.mav.robust_parsing = True
+
+    def write(self, buf):
+        self._channel.send(bytes(buf))
+
+    def close(self):
+        self._channel.close()
+
+
+class RemoteEventBus:
+    """
+    Drop-in replacement for MAVLinkEventBus in the housekeeping process. Publishes
+    the messages relayed by the control process to subscribed queues.
+    """
+
+    def __init__(self):
+        self._task = None
+        self._subscribers = {}
+        self._shutdown_event = asyncio.Event()
+        self._channel = DatagramChannel(config.SUPERVISOR_HOUSEKEEPING_SOCKET, config.SUPERVISOR_CONTROL_SOCKET)
+        self._connection = _RemoteConnection(self._channel)
+        logger.info("Remote MAVLink event bus connected to the control process.")
+
+    def subscribe(self, msg_type: str, queue: asyncio.Queue):
+        """
+        Subscribes an asyncio.Queue to a specific MAVLink message type.
+        :param msg_type: One of HOUSEKEEPING_MSG_TYPES.
+        :param queue: The asyncio.Queue to which messages will be sent.
+        """
+        if msg_type not in HOUSEKEEPING_MSG_TYPES:
+            raise ValueError(f"Message type '{msg_type}' is not forwarded to housekeeping.")
+        self._subscribers.setdefault(msg_type, []).append(queue)
+        logger.info(f"Queue subscribed to message type '{msg_type}'")
+
+    def get_connection(self):
+        """Provides the connection used to send messages through the control process."""
+        return self._connection
+
+    def get_shutdown_event(self):
+        """Returns the shutdown event object."""
+        return self._shutdown_event
+
+    async def run(self):
+        """
+        Receives relayed frames, decodes them and publishes them to subscribers.
+        """
+        logger.info("Remote MAVLink event bus started.")
+        while not self._shutdown_event.is_set():
+            try:
+                for msg in self._connection.mav.parse_buffer(await self._channel.recv()) or []:
+                    for queue in self._subscribers.get(msg.get_type(), []):
+                        await queue.put(msg)
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.exception("Error in remote MAVLink event bus loop:")
+                await asyncio.sleep(config.ERROR_LOOP_SLEEP)
+
+        logger.info("Remote MAVLink event bus stopped.")
+
+    def start(self):
+        """Starts the remote event bus run loop as an asyncio task."""
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def close(self):
+        """Closes the IPC channel."""
+        logger.info("Closing IPC channel.")
+        self._connection.close()
@@ -0,0 +1,207 @@
+"""
+Logging setup. Records are handed to a bounded queue and written to the output by
+a background thread, so a slow SD card never blocks the event loop or the control
+thread. Hot-path call sites can opt in to have identical messages repeated within
+LOG_REPEAT_WINDOW suppressed and reported as a count.
+"""
+import logging
+import queue
+import threading
+import time
+
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+
+from core import config
+from core.settings import config_manager
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+
+# Upper bound of tracked distinct messages before old windows are closed early.
+_MAX_TRACKED_MESSAGES = 1000
+
+# Seconds between checks for ended repeat windows while no records arrive.
+_EXPIRE_INTERVAL = 1.0
+
+# Seconds to wait for the writer to make room for the stop marker in a full queue.
+_STOP_TIMEOUT = 5.0
+
+# Pass as extra= to let the repeat filter suppress a message that a loop may log over
+# and over, e.g. a per-message debug line or a retried operation.
+SUPPRESS_REPEATS = {"suppress_repeats": True}
+
+
+class RepeatFilter(logging.Filter):
+    """
+    Lets a message logged with extra=SUPPRESS_REPEATS through once per
+    LOG_REPEAT_WINDOW. Repeats within the window are counted and reported with a
+    "(repeated N more times)" record when the window ends, or at shutdown. Other
+    messages, and records with a traceback, are never suppressed. A window of 0
+    disables the filter. Called from the event loop, the executor, the control
+    thread and the writer thread.
+    """
+
+    def __init__(self, emit):
+        """:param emit: Callable that outputs a summary record, bypassing the filters."""
+        super().__init__()
+        self._emit = emit
+        self._lock = threading.Lock()
+        # (name, level, message) -> [window start, suppressed count], oldest first
+        self._windows = {}
+
+    def _expire(self, now, window):
+        """Closes the ended windows. Call with the lock held. :return: Their summary records."""
+        summaries = []
+        while self._windows:
+            key, (started, count) = next(iter(self._windows.items()))
+            if now - started < window and len(self._windows) <= _MAX_TRACKED_MESSAGES:
+                break
+            del self._windows[key]
+            if count:
+                summaries.append(_summary(key, count))
+        return summaries
+
+    def filter(self, record):
+        # Merge the arguments once here; the queue handler then only passes strings around.
+        message = record.getMessage()
+        record.msg, record.args = message, None
+
+        window = config.LOG_REPEAT_WINDOW
+        suppressible = window > 0 and not record.exc_info and getattr(record, "suppress_repeats", False)
+        now = time.monotonic()
+        allowed = True
+        with self._lock:
+            summaries = self._expire(now, window)
+            if suppressible:
+                key = (record.name, record.levelno, message)
+                if key in self._windows:
+                    self._windows[key][1] += 1
+                    allowed = False
+                else:
+                    self._windows[key] = [now, 0]
+
+        for summary in summaries:
+            self._emit(summary)
+        return allowed
+
+    def expire(self):
+        """Reports the windows that have ended, so the counts also come out on a quiet log."""
+        with self._lock:
+            summaries = self._expire(time.monotonic(), config.LOG_REPEAT_WINDOW)
+        for summary in summaries:
+            self._emit(summary)
+
+    def flush(self):
+        """Reports the repeat counts of all open windows."""
+        with self._lock:
+            summaries = [_summary(key, count) for key, (_, count) in self._windows.items() if count]
+            self._windows = {}
+        for summary in summaries:
+            self._emit(summary)
+
+
+def _summary(key, count):
+    name, level, message = key
+    return logging.LogRecord(name, level, __file__, 0, f"{message} (repeated {count} more times)", None, None)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks and defers formatting to the writer thread.
+    When the queue is full, records are dropped and the drop count is logged later.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self._dropped = 0
+
+    def prepare(self, record):
+        # Unlike the base class, do not format here: the listener thread does it.
+        # The traceback is kept as exc_info and rendered by the writer as well.
+        record.msg, record.args = record.getMessage(), None
+        return record
+
+    def put(self, record):
+        """Queues a record directly, without the level check and the filters."""
+        with self.lock:
+            self.enqueue(record)
+
+    def enqueue(self, record):
+        try:
+            if self._dropped:
+                dropped = logging.LogRecord(
+                    self.name or __name__, logging.WARNING, __file__, 0,
+                    f"Log queue full, dropped {self._dropped} messages.", None, None
+                )
+                self.queue.put_nowait(dropped)
+                self._dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._dropped += 1
+
+
+class LogWriter(QueueListener):
+    """
+    The background writer. Closes the ended repeat windows while it waits for
+    records, and reports the pending repeat counts before it stops.
+    """
+
+    def __init__(self, log_queue, handler, repeat_filter):
+        super().__init__(log_queue, handler)
+        self._repeat_filter = repeat_filter
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, timeout=_EXPIRE_INTERVAL)
+            except queue.Empty:
+                if not block:
+                    raise
+                self._repeat_filter.expire()
+
+    def stop(self):
+        self._repeat_filter.flush()
+        try:
+            # The queue is bounded: wait for the writer to make room for the stop marker.
+            self.queue.put(self._sentinel, timeout=_STOP_TIMEOUT)
+        except queue.Full:
+            # The writer is stuck on its output. Its daemon thread ends with the process.
+            return
+        self._thread.join()
+        self._thread = None
+
+
+def setup_logging():
+    """
+    Loads the runtime configuration, which sizes the queue, and then routes all
+    logging through the background writer. The messages logged while loading are
+    held back and written first.
+    :return: The LogWriter. Stop it on exit to flush the pending records.
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.setLevel(getattr(logging, config.LOG_LEVEL))
+    startup_handler = MemoryHandler(capacity=1000, flushLevel=logging.CRITICAL + 1)
+    root.addHandler(startup_handler)
+    config_manager.reload()
+    root.removeHandler(startup_handler)
+
+    log_queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+
+    output_handler = logging.StreamHandler()
+    output_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    repeat_filter = RepeatFilter(queue_handler.put)
+    queue_handler.addFilter(repeat_filter)
+
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, config.LOG_LEVEL))
+    config_manager.subscribe(["LOG_LEVEL"], lambda changes: root.setLevel(getattr(logging, config.LOG_LEVEL)))
+
+    startup_handler.setTarget(queue_handler)
+    startup_handler.close()
+
+    writer = LogWriter(log_queue, output_handler, repeat_filter)
+    writer.start()
+    return writer
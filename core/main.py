@@ -1,44 +1,73 @@
 """
 Main entry point for the FPV Crawler application.
+Component modules are imported inside main(): the driving path first, everything
+else only after the heartbeat and RC control are already running.
 """
+import argparse
 import asyncio
 import logging
 import signal
 
 from core import config
-from core.crawler import CrawlerController
-from core.mavlink.bus import MAVLinkEventBus
-from core.mavlink.consumers.heartbeat import HeartbeatConsumer
-from core.mavlink.consumers.manual_control import ManualControlConsumer
-from core.mavlink.consumers.parameters import ParameterConsumer
-from core.mavlink.consumers.system import SystemConsumer
-from core.mavlink.producers.heartbeat import HeartbeatProducer
-from core.mavlink.producers.gps import GpsProducer
-from core.network import NetworkManager
+from core.log import setup_logging
+from core.settings import config_manager
 
 logger = logging.getLogger(__name__)
 
 
-async def main():
+async def main(role="all"):
     """
     The main entry point of the crawler application.
     Initializes and orchestrates all the different components.
+    :param role: 'all' runs everything in this process. In supervisor mode the
+                 'control' and 'housekeeping' roles run in separate processes.
     """
+    run_control = role in ("all", "control")
+    run_housekeeping = role in ("all", "housekeeping")
 
-    # --- Initialize Core Components & Bus ---
-    mavlink_event_bus = MAVLinkEventBus()
-    crawler_controller = CrawlerController()
-    network_manager = NetworkManager(mavlink_event_bus)
-
-    # --- Create MAVLink Consumers (Subscribers) ---
-    mavlink_system_consumer = SystemConsumer(mavlink_event_bus)
-    mavlink_manual_control = ManualControlConsumer(mavlink_event_bus, crawler_controller)
-    mavlink_parameter_consumer = ParameterConsumer(mavlink_event_bus)
-    mavlink_heartbeat_consumer = HeartbeatConsumer(mavlink_event_bus)
+    # Components, in start order
+    components_to_start = []
+    # Components that need to be explicitly closed
+    components_to_close = []
 
-    # --- Create MAVLink Producers ---
-    mavlink_heartbeat_producer = HeartbeatProducer(mavlink_event_bus)
-    mavlink_gps_producer = GpsProducer(mavlink_event_bus)
+    # --- Initialize Core Components & Bus ---
+    if run_control:
+        from core.crawler import CrawlerController
+        from core.mavlink.bus import MAVLinkEventBus
+        from core.mavlink.consumers.system import SystemConsumer
+        from core.mavlink.producers.heartbeat import HeartbeatProducer
+
+        crawler_controller = CrawlerController()
+        mavlink_event_bus = MAVLinkEventBus()
+
+        # --- Create MAVLink Consumers (Subscribers) ---
+        mavlink_system_consumer = SystemConsumer(mavlink_event_bus)
+        if config.CONTROL_THREAD_ENABLED:
+            # The control thread takes over MAVLink receiving and MANUAL_CONTROL handling.
+            from core.realtime import RealtimeControlLoop
+            mavlink_manual_control = RealtimeControlLoop(mavlink_event_bus, crawler_controller)
+        else:
+            from core.mavlink.consumers.manual_control import ManualControlConsumer
+            mavlink_manual_control = ManualControlConsumer(mavlink_event_bus, crawler_controller)
+
+        # --- Create MAVLink Producers ---
+        mavlink_heartbeat_producer = HeartbeatProducer(mavlink_event_bus)
+
+        components_to_start += [
+            crawler_controller,
+            mavlink_event_bus,
+            mavlink_heartbeat_producer,
+            mavlink_system_consumer,
+            mavlink_manual_control,
+        ]
+        # The control thread must stop before the connection it reads from is closed.
+        components_to_close += [mavlink_manual_control, mavlink_event_bus, crawler_controller]
+    else:
+        # The housekeeping process talks MAVLink through the control process.
+        from core.ipc import RemoteEventBus
+        mavlink_event_bus = RemoteEventBus()
+        components_to_start.append(mavlink_event_bus)
+        components_to_close.append(mavlink_event_bus)
 
     # --- Graceful Shutdown Setup ---
     shutdown_event = mavlink_event_bus.get_shutdown_event()
@@ -50,25 +79,98 @@ async def main():
 
     for sig in (signal.SIGINT, signal.SIGTERM):
         loop.add_signal_handler(sig, signal_handler)
+    loop.add_signal_handler(signal.SIGHUP, config_manager.reload)
 
-    # --- Start All Components ---
+    # --- Start the Driving Path ---
     # Consumers and Producers are fully managed components with start() methods
-    components_to_start = [
-        crawler_controller,
-        network_manager,
-        mavlink_event_bus,
-        mavlink_heartbeat_producer,
-        mavlink_gps_producer,
-        mavlink_system_consumer,
-        mavlink_manual_control,
-        mavlink_parameter_consumer,
-        mavlink_heartbeat_consumer,
-    ]
-
-    # Components that need to be explicitly closed
-    components_to_close = [mavlink_event_bus, crawler_controller]
-
     tasks = [comp.start() for comp in components_to_start]
+    # Let the first heartbeat go out before loading the rest.
+    await asyncio.sleep(0)
+    components_to_start = []
+
+    # --- Create the Deferred Components ---
+    if run_control:
+        from core.mavlink.consumers.gimbal import GimbalConsumer
+        from core.mavlink.producers.gps import GpsProducer
+
+        mavlink_gps_producer = GpsProducer(mavlink_event_bus)
+        mavlink_gimbal_consumer = GimbalConsumer(mavlink_event_bus, crawler_controller)
+        components_to_start += [mavlink_gps_producer, mavlink_gimbal_consumer]
+
+    if run_housekeeping:
+        from core.mavlink.consumers.heartbeat import HeartbeatConsumer
+        from core.mavlink.consumers.parameters import ParameterConsumer
+        from core.mavlink.producers.link import LinkMetricsProducer
+        from core.modem import ModemMonitor
+        from core.network import NetworkManager
+
+        network_manager = NetworkManager(mavlink_event_bus)
+        modem_monitor = ModemMonitor(mavlink_event_bus)
+        mavlink_parameter_consumer = ParameterConsumer(mavlink_event_bus)
+        mavlink_heartbeat_consumer = HeartbeatConsumer(mavlink_event_bus)
+        mavlink_link_producer = LinkMetricsProducer(mavlink_event_bus, modem_monitor)
+
+        components_to_start += [
+            network_manager,
+            modem_monitor,
+            mavlink_link_producer,
+            mavlink_parameter_consumer,
+            mavlink_heartbeat_consumer,
+        ]
+
+        if config.VIDEO_FEC_ENABLED:
+            from core.video.sender import VideoFecSender
+
+            video_fec_sender = VideoFecSender(mavlink_event_bus)
+            components_to_start.append(video_fec_sender)
+            components_to_close.append(video_fec_sender)
+
+    # --- Supervisor Mode Plumbing ---
+    if role == "control":
+        from core.ipc import HousekeepingBridge
+        from core.shared_state import SharedState, SharedStatePublisher
+
+        shared_state = SharedState()
+        housekeeping_bridge = HousekeepingBridge(mavlink_event_bus)
+        state_publisher = SharedStatePublisher(
+            mavlink_event_bus, shared_state, "control",
+            lambda: {"failsafe": crawler_controller.is_failsafe_active()}
+        )
+        components_to_start += [housekeeping_bridge, state_publisher]
+        components_to_close += [housekeeping_bridge, shared_state]
+    elif role == "housekeeping":
+        from core.shared_state import SharedState, SharedStatePublisher
+
+        def collect_housekeeping_state():
+            metrics = modem_monitor.get_metrics()
+            state = dict(network_manager.get_status())
+            state["video"] = mavlink_heartbeat_consumer.is_service_active()
+            state["modem"] = metrics["available"]
+            for key in ("rssi", "rsrp", "rsrq", "sinr", "band"):
+                state[key] = int(metrics.get(key) or 0)
+            return state
+
+        shared_state = SharedState()
+        state_publisher = SharedStatePublisher(
+            mavlink_event_bus, shared_state, "housekeeping", collect_housekeeping_state
+        )
+        components_to_start.append(state_publisher)
+        components_to_close.append(shared_state)
+
+    # --- Start the Remaining Components ---
+    config_manager.attach(mavlink_event_bus)
+    components_to_start.append(config_manager)
+    if run_control:
+        # Started last, so loading the deferred components is not mistaken for a stall.
+        from core.watchdog import LivenessWatchdog
+        liveness_watchdog = LivenessWatchdog(mavlink_event_bus, {
+            "bus": mavlink_event_bus.get_progress,
+            "control": mavlink_manual_control.get_progress,
+            "failsafe": crawler_controller.get_progress,
+        })
+        components_to_start.append(liveness_watchdog)
+        components_to_close.insert(0, liveness_watchdog)
+    tasks += [comp.start() for comp in components_to_start]
     logger.info("All components started.")
 
     # --- Wait for Shutdown ---
@@ -76,9 +178,9 @@ async def main():
     logger.info("Shutdown initiated. Cancelling all component tasks...")
 
     # --- Clean Up ---
+    tasks = [task for task in tasks if task]
     for task in tasks:
-        if task:
-            task.cancel()
+        task.cancel()
 
     # Allow tasks to process cancellation
     await asyncio.gather(*tasks, return_exceptions=True)
@@ -90,12 +192,27 @@ async def main():
     logger.info("Application shutdown complete.")
 
 
+async def supervise():
+    """Runs the control and housekeeping roles as separately restartable processes."""
+    from core.supervisor import Supervisor
+
+    await Supervisor().run()
+
+
 if __name__ == "__main__":
-    logging.basicConfig(
-        level=getattr(logging, config.LOG_LEVEL),
-        format='%(asctime)s - %(levelname)s - %(name)s - %(message)s',
-    )
+    parser = argparse.ArgumentParser(description="FPV Crawler")
+    parser.add_argument("--supervisor", action="store_true",
+                        help="Run control and housekeeping in separate, independently restarted processes.")
+    parser.add_argument("--role", choices=("all", "control", "housekeeping"), default="all",
+                        help="Components to run in this process (used by the supervisor).")
+    args = parser.parse_args()
+
+    # Also loads the runtime configuration, it sizes the log queue.
+    log_listener = setup_logging()
     try:
-        asyncio.run(main())
+        asyncio.run(supervise() if args.supervisor else main(args.role))
     except (KeyboardInterrupt, SystemExit):
         logger.warning("Shutdown requested by user.")
+    finally:
+        # Flush the records still waiting in the log queue.
+        log_listener.stop()
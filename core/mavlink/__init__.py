@@ -0,0 +1,2 @@
+# Selects the MAVLink dialect before any module of the package imports pymavlink.mavutil.
+from core.mavlink import dialect  # noqa: F401
@@ -4,10 +4,11 @@ Handles the core MAVLink connection and acts as a message bus.
 import asyncio
 import logging
 
-from collections import defaultdict
+from collections import defaultdict, deque
 from pymavlink import mavutil
 
 from core import config
+from core.settings import config_manager
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +23,8 @@ class MAVLinkEventBus:
         self._task = None
         self._subscribers = defaultdict(list)
         self._shutdown_event = asyncio.Event()
+        self._inbox = None
+        self._loop_count = 0
 
         connection_string = f'udpout:{config.GROUND_CONTROL_STATION_IP}:{config.MAVLINK_PORT}'
         logger.info(f"Opening MAVLink connection to {connection_string}...")
@@ -31,6 +34,12 @@ class MAVLinkEventBus:
             source_component=config.MAVLINK_SOURCE_COMPONENT
         )
         logger.info("MAVLink Event Bus connection established.")
+        config_manager.subscribe(["GROUND_CONTROL_STATION_IP", "MAVLINK_PORT"], self._retarget)
+
+    def _retarget(self, changes):
+        """Points the outgoing connection to a new GCS address without reconnecting."""
+        self._connection.destination_addr = (config.GROUND_CONTROL_STATION_IP, config.MAVLINK_PORT)
+        logger.info(f"MAVLink connection retargeted to {config.GROUND_CONTROL_STATION_IP}:{config.MAVLINK_PORT}.")
 
     def subscribe(self, msg_type: str, queue: asyncio.Queue):
         """
@@ -43,6 +52,16 @@ class MAVLinkEventBus:
         self._subscribers[msg_type].append(queue)
         logger.info(f"Queue subscribed to message type '{msg_type}'")
 
+    def attach_receiver(self, inbox: deque):
+        """
+        Hands the receiving side of the connection over to an external reader
+        (the real-time control thread). The bus then dispatches the messages that
+        the reader appends to the inbox instead of polling the connection itself.
+        :param inbox: A bounded deque filled by the external reader.
+        """
+        self._inbox = inbox
+        logger.info("MAVLink receiving delegated to an external reader.")
+
     def get_connection(self):
         """Provides direct access to the underlying pymavlink connection."""
         return self._connection
@@ -51,6 +70,17 @@ class MAVLinkEventBus:
         """Returns the shutdown event object."""
         return self._shutdown_event
 
+    def get_progress(self):
+        """Returns the number of receive loop iterations, for the liveness watchdog."""
+        return self._loop_count
+
+    async def _dispatch(self, msg):
+        """Publishes a message to all queues subscribed to its type."""
+        msg_type = msg.get_type()
+        if msg_type in self._subscribers:
+            for queue in self._subscribers[msg_type]:
+                await queue.put(msg)
+
     # --- Main Loops ---
 
     async def run(self):
@@ -60,13 +90,16 @@ class MAVLinkEventBus:
         """
         logger.info("MAVLink event bus started.")
         while not self._shutdown_event.is_set():
+            self._loop_count += 1
             try:
-                msg = self._connection.recv_match(blocking=False)
-                if msg:
-                    msg_type = msg.get_type()
-                    if msg_type in self._subscribers:
-                        for queue in self._subscribers[msg_type]:
-                            await queue.put(msg)
+                if self._inbox is not None:
+                    # deque.popleft() is atomic, so no lock is shared with the reader thread.
+                    while self._inbox:
+                        await self._dispatch(self._inbox.popleft())
+                else:
+                    msg = self._connection.recv_match(blocking=False)
+                    if msg:
+                        await self._dispatch(msg)
 
                 await asyncio.sleep(config.MAVLINK_RECV_LOOP_SLEEP)
             except asyncio.CancelledError:
@@ -16,6 +16,8 @@ class MAVLinkConsumer(ABC):
         self._shutdown_event = event_bus.get_shutdown_event()
         self._internal_queue = asyncio.Queue()
         self._task = None
+        self._processing = False
+        self._processed_count = 0
 
         # The base class handles its own subscription
         for msg_type in msg_types:
@@ -41,14 +43,29 @@ class MAVLinkConsumer(ABC):
         while not self._shutdown_event.is_set():
             try:
                 msg = await self._internal_queue.get()
+                self._processing = True
                 await self.process_message(msg)
             except asyncio.CancelledError:
                 break
             except Exception:
                 logger.exception(f"Error in {self.__class__.__name__} loop:")
+            finally:
+                if self._processing:
+                    self._processing = False
+                    self._processed_count += 1
 
         logger.info(f"{self.__class__.__name__} stopped.")
 
+    def get_progress(self):
+        """
+        Returns the number of processed messages, or None while the consumer is idle
+        (nothing queued and nothing in progress). Used by the liveness watchdog to
+        tell a stalled consumer from one that has no work.
+        """
+        if not self._processing and self._internal_queue.empty():
+            return None
+        return self._processed_count
+
     def start(self):
         """
         Starts the consumer's run loop as an asyncio task.
@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import math
+
+from pymavlink import mavutil
+
+from core import config
+from core.crawler import CrawlerController
+from core.mavlink.consumer import MAVLinkConsumer
+from core.settings import config_manager
+
+logger = logging.getLogger(__name__)
+
+AXES = ("roll", "pitch", "yaw")
+
+# MANUAL_CONTROL enabled_extensions bit of aux1. aux2-aux6 follow in the next bits.
+_AUX1_EXTENSION_BIT = 2
+
+# The crawler is both the gimbal manager and the gimbal device, so it accepts commands
+# addressed to its own component, to the gimbal component or to all components.
+_GIMBAL_COMPONENTS = (mavutil.mavlink.MAV_COMP_ID_ALL, mavutil.mavlink.MAV_COMP_ID_GIMBAL)
+
+
+class _Axis:
+    """Target, rate command and output state of a single gimbal axis, in degrees."""
+
+    def __init__(self, name):
+        self.name = name
+        self.pin = None
+        self.pin_number = None
+        self.target = 0.0
+        self.rate = 0.0
+        self.position = 0.0
+        self.written = None
+        # True once a move has ended with a write of its exact target.
+        self.landed = False
+
+    def get_range(self):
+        return getattr(config, f"GIMBAL_{self.name.upper()}_RANGE")
+
+    def set_target(self, angle):
+        limit = self.get_range()
+        self.target = max(-limit, min(limit, angle))
+        self.rate = 0.0
+
+    def set_rate(self, rate):
+        self.rate = rate
+
+
+class GimbalConsumer(MAVLinkConsumer):
+    """
+    Consumes gimbal commands (GIMBAL_MANAGER_SET_*, MOUNT_CONTROL, the matching
+    COMMAND_LONGs and MANUAL_CONTROL aux axes) and drives the camera gimbal servos.
+    Commands only update the axis targets. A separate loop moves the servos towards
+    them at a fixed rate with a slew-rate limit, so bursty GCS input turns into
+    smooth motion and the serial link sees at most one write per axis per tick.
+    """
+    def __init__(self, event_bus, hardware_controller: CrawlerController):
+        super().__init__(event_bus, [
+            'GIMBAL_MANAGER_SET_ATTITUDE',
+            'GIMBAL_MANAGER_SET_PITCHYAW',
+            'GIMBAL_MANAGER_SET_MANUAL_CONTROL',
+            'MOUNT_CONTROL',
+            'COMMAND_LONG',
+            'MANUAL_CONTROL',
+        ])
+        self._hardware = hardware_controller
+        self._connection = event_bus.get_connection()
+        self._axes = {name: _Axis(name) for name in AXES}
+        self._last_aux = {}
+        self._last_rate_command_time = 0.0
+
+        for axis in self._axes.values():
+            pin_number = getattr(config, f"GIMBAL_{axis.name.upper()}_PIN")
+            if pin_number is not None:
+                axis.pin = hardware_controller.attach_servo(pin_number, config.GIMBAL_MIN_PULSE, config.GIMBAL_MAX_PULSE)
+                axis.pin_number = pin_number
+        config_manager.subscribe(["GIMBAL_MIN_PULSE", "GIMBAL_MAX_PULSE"], self._configure_servos)
+
+    def _configure_servos(self, changes):
+        for axis in self._axes.values():
+            if axis.pin is not None:
+                self._hardware.configure_servo(axis.pin_number, config.GIMBAL_MIN_PULSE, config.GIMBAL_MAX_PULSE)
+
+    def _set_targets(self, **angles):
+        """Sets absolute targets in degrees. NaN values leave the axis unchanged."""
+        for name, angle in angles.items():
+            if not math.isnan(angle):
+                self._axes[name].set_target(angle)
+
+    def _set_rates(self, **rates):
+        """Sets angular rate commands in deg/s. NaN values leave the axis unchanged."""
+        for name, rate in rates.items():
+            if not math.isnan(rate):
+                self._axes[name].set_rate(rate)
+                self._last_rate_command_time = asyncio.get_running_loop().time()
+
+    def _center(self):
+        for axis in self._axes.values():
+            axis.set_target(0.0)
+
+    def _handle_flags(self, flags):
+        """Handles the retract/neutral flags. Returns True if the command was consumed."""
+        if flags & (mavutil.mavlink.GIMBAL_MANAGER_FLAGS_RETRACT | mavutil.mavlink.GIMBAL_MANAGER_FLAGS_NEUTRAL):
+            self._center()
+            return True
+        return False
+
+    def _handle_attitude(self, msg):
+        if self._handle_flags(msg.flags):
+            return
+        w, x, y, z = msg.q
+        if not math.isnan(w):
+            roll = math.atan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y))
+            pitch = math.asin(max(-1.0, min(1.0, 2 * (w * y - z * x))))
+            yaw = math.atan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z))
+            self._set_targets(roll=math.degrees(roll), pitch=math.degrees(pitch), yaw=math.degrees(yaw))
+        self._set_rates(
+            roll=math.degrees(msg.angular_velocity_x),
+            pitch=math.degrees(msg.angular_velocity_y),
+            yaw=math.degrees(msg.angular_velocity_z),
+        )
+
+    def _handle_pitchyaw(self, msg):
+        if self._handle_flags(msg.flags):
+            return
+        self._set_targets(pitch=math.degrees(msg.pitch), yaw=math.degrees(msg.yaw))
+        self._set_rates(pitch=math.degrees(msg.pitch_rate), yaw=math.degrees(msg.yaw_rate))
+
+    def _handle_gimbal_manual_control(self, msg):
+        if self._handle_flags(msg.flags):
+            return
+        # Angles and rates are normalized to -1..1.
+        self._set_targets(
+            pitch=msg.pitch * self._axes["pitch"].get_range(),
+            yaw=msg.yaw * self._axes["yaw"].get_range(),
+        )
+        self._set_rates(pitch=msg.pitch_rate * config.GIMBAL_MANUAL_RATE, yaw=msg.yaw_rate * config.GIMBAL_MANUAL_RATE)
+
+    def _handle_command(self, msg):
+        if msg.command == mavutil.mavlink.MAV_CMD_DO_MOUNT_CONTROL:
+            self._set_targets(pitch=msg.param1, roll=msg.param2, yaw=msg.param3)
+        elif msg.command == mavutil.mavlink.MAV_CMD_DO_GIMBAL_MANAGER_PITCHYAW:
+            if math.isnan(msg.param5) or not self._handle_flags(int(msg.param5)):
+                self._set_targets(pitch=msg.param1, yaw=msg.param2)
+                self._set_rates(pitch=msg.param3, yaw=msg.param4)
+        else:
+            return
+
+        # Without an ACK the GCS keeps retrying and reports that the vehicle did not respond.
+        self._connection.mav.command_ack_send(
+            msg.command, mavutil.mavlink.MAV_RESULT_ACCEPTED,
+            target_system=msg.get_srcSystem(), target_component=msg.get_srcComponent()
+        )
+
+    def _is_for_this_gimbal(self, msg):
+        """
+        Checks the target of a command. MANUAL_CONTROL only has a target system,
+        and a target system of 0 is a broadcast.
+        """
+        target_system = msg.target if msg.get_type() == 'MANUAL_CONTROL' else msg.target_system
+        if target_system not in (0, config.MAVLINK_SOURCE_SYSTEM):
+            return False
+        target_component = getattr(msg, 'target_component', config.MAVLINK_SOURCE_COMPONENT)
+        return target_component == config.MAVLINK_SOURCE_COMPONENT or target_component in _GIMBAL_COMPONENTS
+
+    def _handle_manual_control(self, msg):
+        """
+        Maps the configured MANUAL_CONTROL aux axes (-1000..1000) to absolute yaw/pitch.
+        Only changes are applied, so an idle knob does not override other gimbal commands.
+        """
+        extensions = getattr(msg, 'enabled_extensions', 0)
+        for name, aux_index in (("yaw", config.GIMBAL_AUX_YAW), ("pitch", config.GIMBAL_AUX_PITCH)):
+            if not aux_index or not extensions & (1 << (_AUX1_EXTENSION_BIT + aux_index - 1)):
+                continue
+            value = getattr(msg, f'aux{aux_index}')
+            if self._last_aux.get(name) != value:
+                self._last_aux[name] = value
+                self._axes[name].set_target(value / 1000 * self._axes[name].get_range())
+
+    async def process_message(self, msg):
+        """
+        Processes an incoming gimbal related message and updates the axis targets.
+        """
+        if not self._is_for_this_gimbal(msg):
+            return
+        msg_type = msg.get_type()
+        if msg_type == 'MANUAL_CONTROL':
+            self._handle_manual_control(msg)
+        elif msg_type == 'COMMAND_LONG':
+            self._handle_command(msg)
+        elif msg_type == 'GIMBAL_MANAGER_SET_ATTITUDE':
+            self._handle_attitude(msg)
+        elif msg_type == 'GIMBAL_MANAGER_SET_PITCHYAW':
+            self._handle_pitchyaw(msg)
+        elif msg_type == 'GIMBAL_MANAGER_SET_MANUAL_CONTROL':
+            self._handle_gimbal_manual_control(msg)
+        elif msg_type == 'MOUNT_CONTROL':
+            # Angles are in centidegrees: input_a = pitch, input_b = roll, input_c = yaw.
+            self._set_targets(pitch=msg.input_a / 100, roll=msg.input_b / 100, yaw=msg.input_c / 100)
+
+    def _step(self, dt, now):
+        """
+        Advances every axis by one output tick.
+        :return: List of (pin, servo angle) writes that are due.
+        """
+        # Rate commands that are not refreshed stop, like the servos on RC failsafe.
+        if now - self._last_rate_command_time > config.FAILSAFE_INTERVAL:
+            for axis in self._axes.values():
+                axis.rate = 0.0
+
+        max_step = config.GIMBAL_MAX_RATE * dt
+        writes = []
+        for axis in self._axes.values():
+            limit = axis.get_range()
+            if axis.rate:
+                axis.target = max(-limit, min(limit, axis.target + axis.rate * dt))
+            if abs(axis.target - axis.position) <= max_step:
+                axis.position = axis.target
+            else:
+                axis.position += math.copysign(max_step, axis.target - axis.position)
+
+            if axis.pin is None:
+                continue
+            # Skip writes below the deadband, but land a move exactly on its target.
+            # Once landed, target changes below the deadband are not written.
+            if axis.written is None or abs(axis.position - axis.written) >= config.GIMBAL_DEADBAND:
+                axis.landed = axis.position == axis.target
+            elif axis.landed or axis.position != axis.target or axis.written == axis.target:
+                continue
+            else:
+                axis.landed = True
+            axis.written = axis.position
+            writes.append((axis.pin, 90 + axis.position / limit * 90))
+        return writes
+
+    async def _output_loop(self):
+        """Writes the interpolated gimbal position at GIMBAL_OUTPUT_RATE."""
+        loop = asyncio.get_running_loop()
+        last = loop.time()
+        while not self._shutdown_event.is_set():
+            try:
+                await asyncio.sleep(1 / config.GIMBAL_OUTPUT_RATE)
+                now = loop.time()
+                writes = self._step(now - last, now)
+                last = now
+                await self._hardware.write_servos(writes)
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.exception("Error in gimbal output loop:")
+                await asyncio.sleep(config.ERROR_LOOP_SLEEP)
+
+    async def run(self):
+        """Runs the message processing loop together with the fixed-rate output loop."""
+        await asyncio.gather(super().run(), self._output_loop())
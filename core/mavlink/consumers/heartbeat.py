@@ -3,6 +3,7 @@ import logging
 import subprocess
 
 from core import config
+from core.log import SUPPRESS_REPEATS
 from core.mavlink.consumer import MAVLinkConsumer
 
 logger = logging.getLogger(__name__)
@@ -16,6 +17,10 @@ class HeartbeatConsumer(MAVLinkConsumer):
         super().__init__(event_bus, ['HEARTBEAT'])
         self._service_active = False
 
+    def is_service_active(self):
+        """Returns True once the video service has been started."""
+        return self._service_active
+
     async def _start_service(self):
         """Starts the video stream service asynchronously."""
         logger.info(f"Starting video service: {config.VIDEO_SERVICE_NAME}")
@@ -28,7 +33,7 @@ class HeartbeatConsumer(MAVLinkConsumer):
             self._service_active = True
             logger.info("Video service started successfully.")
         except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to start video service: {e}")
+            logger.error(f"Failed to start video service: {e}", extra=SUPPRESS_REPEATS)
         except Exception:
             logger.exception("An unexpected error occurred while starting the video service.")
 
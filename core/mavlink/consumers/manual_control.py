@@ -1,6 +1,7 @@
 import logging
 
 from core.crawler import CrawlerController
+from core.log import SUPPRESS_REPEATS
 from core.mavlink.consumer import MAVLinkConsumer
 
 logger = logging.getLogger(__name__)
@@ -18,6 +19,8 @@ class ManualControlConsumer(MAVLinkConsumer):
         Processes an incoming MANUAL_CONTROL message and commands the hardware.
         msg.r = Steering, msg.z = Throttle. Values range from -1000 to 1000.
         """
-        logger.debug(f"RC -> {msg.to_json()}")
+        # Hot path: only serialize the message when DEBUG is actually enabled.
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("RC -> %s", msg.to_json(), extra=SUPPRESS_REPEATS)
         await self._hardware.set_steering(msg.r)
         await self._hardware.set_throttle(msg.z)
@@ -42,7 +42,7 @@ class ParameterConsumer(MAVLinkConsumer):
                 list(self._params.keys()).index(param_name)
             )
 
-            logger.debug(f"Sent param {param_name} = {param_value}")
+            logger.debug("Sent param %s = %s", param_name, param_value)
 
     async def _send_all_params(self):
         logger.info(f"Sending all {len(self._params)} parameters to GCS.")
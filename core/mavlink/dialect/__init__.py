@@ -0,0 +1,58 @@
+"""
+Selects the MAVLink dialect before pymavlink.mavutil is imported.
+
+The default "crawler" dialect (crawler.xml) only contains the messages the crawler
+handles and loads much faster and smaller than the full ardupilotmega dialect.
+crawler.py is generated from the XML. After editing the XML, regenerate it with:
+
+    mavgen.py --lang=Python3 --wire-protocol=2.0 \\
+        --output=core/mavlink/dialect/crawler.py core/mavlink/dialect/crawler.xml
+"""
+import importlib
+import logging
+import os
+import sys
+
+from core import config
+
+logger = logging.getLogger(__name__)
+
+CRAWLER_DIALECT = "crawler"
+
+
+def _install(name):
+    """
+    Makes the dialect available to mavutil and returns its module. Unknown dialect
+    names fall back to ardupilotmega.
+    :param name: "crawler" or the name of a pymavlink dialect.
+    """
+    # All the gimbal messages are MAVLink 2 only, so always speak MAVLink 2.
+    os.environ["MAVLINK20"] = "1"
+
+    if name == CRAWLER_DIALECT:
+        import pymavlink.dialects.v20
+        from core.mavlink.dialect import crawler
+        # mavutil resolves the dialect as pymavlink.dialects.v20.<name>.
+        sys.modules[f"pymavlink.dialects.v20.{name}"] = crawler
+        setattr(pymavlink.dialects.v20, name, crawler)
+        # mavutil also imports the full MAVLink 1 ardupilotmega dialect for pyinstaller
+        # builds. It is never used with MAVLink 2, so skip loading it.
+        sys.modules.setdefault("pymavlink.dialects.v10.ardupilotmega", None)
+        module = crawler
+    else:
+        try:
+            module = importlib.import_module(f"pymavlink.dialects.v20.{name}")
+        except ImportError:
+            logger.error(f"Unknown MAVLink dialect '{name}'. Falling back to ardupilotmega.")
+            name = "ardupilotmega"
+            module = importlib.import_module(f"pymavlink.dialects.v20.{name}")
+
+    os.environ["MAVLINK_DIALECT"] = name
+    if "pymavlink.mavutil" in sys.modules:
+        # Imported too early (e.g. by a script); switch the already loaded module.
+        sys.modules["pymavlink.mavutil"].set_dialect(name)
+    return module
+
+
+# The active dialect module, the same one mavutil.mavlink refers to.
+mavlink = _install(config.MAVLINK_DIALECT)
@@ -3,6 +3,7 @@ import logging
 import time
 
 from core import config
+from core.log import SUPPRESS_REPEATS
 from core.mavlink.producer import MAVLinkProducer
 
 logger = logging.getLogger(__name__)
@@ -32,7 +33,7 @@ class GpsProducer(MAVLinkProducer):
                     "lat": config.MOCK_LAT,
                     "lon": config.MOCK_LON
                 }
-                logger.debug("Produced mock GPS location.")
+                logger.debug("Produced mock GPS location.", extra=SUPPRESS_REPEATS)
 
                 # Send the GLOBAL_POSITION_INT message
                 self._connection.mav.global_position_int_send(
@@ -41,7 +42,7 @@ class GpsProducer(MAVLinkProducer):
                     int(location['lon'] * 1e7),
                     10000, 0, 0, 0, 0, 65535
                 )
-                logger.debug("Sent GLOBAL_POSITION_INT from mock GPS data.")
+                logger.debug("Sent GLOBAL_POSITION_INT from mock GPS data.", extra=SUPPRESS_REPEATS)
 
                 await asyncio.sleep(config.GPS_LOOP_SLEEP)
 
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import time
+
+from core import config
+from core.log import SUPPRESS_REPEATS
+from core.mavlink.producer import MAVLinkProducer
+
+logger = logging.getLogger(__name__)
+
+
+class LinkMetricsProducer(MAVLinkProducer):
+    """
+    A MAVLink producer that reports the 4G link metrics collected by the ModemMonitor
+    as RADIO_STATUS and NAMED_VALUE_FLOAT messages.
+    """
+
+    # Metric key -> NAMED_VALUE_FLOAT name (max 10 characters).
+    _NAMED_VALUES = {
+        "rssi": "LTE_RSSI",
+        "rsrp": "LTE_RSRP",
+        "rsrq": "LTE_RSRQ",
+        "sinr": "LTE_SINR",
+        "band": "LTE_BAND",
+        "download_rate": "LTE_DLRATE",
+        "upload_rate": "LTE_ULRATE",
+    }
+
+    def __init__(self, event_bus, modem_monitor):
+        super().__init__(event_bus)
+        self._modem_monitor = modem_monitor
+        self._boot_time = time.time()
+
+    def _get_boot_time_ms(self):
+        """Returns the time since producers start in milliseconds."""
+        return int((time.time() - self._boot_time) * 1000)
+
+    @staticmethod
+    def _rssi_to_radio_status(rssi_dbm):
+        """Encodes dBm using the SiK radio convention understood by QGC (255 = unknown)."""
+        if rssi_dbm is None:
+            return 255
+        return max(0, min(254, int((rssi_dbm + 127) * 1.9)))
+
+    async def run(self):
+        """
+        The main loop that periodically sends the latest cached link metrics.
+        """
+        while not self._shutdown_event.is_set():
+            try:
+                metrics = self._modem_monitor.get_metrics()
+                if metrics["available"]:
+                    self._connection.mav.radio_status_send(
+                        self._rssi_to_radio_status(metrics["rssi"]),
+                        255, 100, 255, 255, 0, 0
+                    )
+                    time_boot_ms = self._get_boot_time_ms()
+                    for key, name in self._NAMED_VALUES.items():
+                        value = metrics.get(key)
+                        if value is not None:
+                            self._connection.mav.named_value_float_send(time_boot_ms, name.encode('utf-8'), float(value))
+                    logger.debug("Sent 4G link metrics.", extra=SUPPRESS_REPEATS)
+
+                await asyncio.sleep(config.LINK_METRICS_LOOP_SLEEP)
+
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.exception("Error in LinkMetricsProducer loop:")
+                await asyncio.sleep(config.ERROR_LOOP_SLEEP)
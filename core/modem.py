@@ -0,0 +1,215 @@
+"""
+Collects cellular link metrics from the Huawei E3372h dongle running in HiLink mode.
+"""
+import asyncio
+import http.client
+import logging
+import re
+import time
+import xml.etree.ElementTree as ElementTree
+
+from core import config
+
+logger = logging.getLogger(__name__)
+
+# HiLink error codes that mean the session/token pair has to be refreshed.
+_SESSION_ERRORS = {"100003", "125001", "125002", "125003"}
+
+# Subset of the HiLink CurrentNetworkType(Ex) values that the dongle reports.
+_NETWORK_TYPES = {
+    0: "NO_SERVICE", 1: "GSM", 2: "GPRS", 3: "EDGE", 4: "WCDMA", 5: "HSDPA",
+    6: "HSUPA", 7: "HSPA", 9: "HSPA+", 19: "LTE", 41: "WCDMA", 46: "DC-HSPA+",
+    101: "LTE", 1011: "LTE_CA",
+}
+
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+class HiLinkError(Exception):
+    """Raised when the HiLink web API returns an <error> response."""
+
+    def __init__(self, code):
+        super().__init__(f"HiLink API error {code}")
+        self.code = code
+
+
+class HiLinkClient:
+    """
+    Minimal blocking client for the HiLink web API. A single HTTP/1.1 keep-alive
+    connection is reused for all requests and re-opened only after a failure.
+    """
+
+    def __init__(self, host, port=80, timeout=1.0):
+        self._host = host
+        self._port = port
+        self._timeout = timeout
+        self._connection = None
+        self._session_headers = None
+
+    def _get_connection(self):
+        if self._connection is None:
+            self._connection = http.client.HTTPConnection(self._host, self._port, timeout=self._timeout)
+        return self._connection
+
+    def _request(self, path, headers):
+        """Performs a GET on the persistent connection and returns the parsed XML root."""
+        connection = self._get_connection()
+        try:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            # The body must be fully read before the connection can be reused.
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+
+        if response.will_close:
+            self.close()
+
+        root = ElementTree.fromstring(body)
+        if root.tag == "error":
+            raise HiLinkError(root.findtext("code", default=""))
+        return root
+
+    def _refresh_session(self):
+        root = self._request("/api/webserver/SesTokInfo", {})
+        self._session_headers = {
+            "Cookie": root.findtext("SesInfo", default=""),
+            "__RequestVerificationToken": root.findtext("TokInfo", default=""),
+        }
+
+    def get(self, path):
+        """
+        Fetches an API endpoint and returns its fields as a dictionary.
+        The session token is cached and only refreshed when the dongle rejects it.
+        """
+        if self._session_headers is None:
+            self._refresh_session()
+        try:
+            root = self._request(path, self._session_headers)
+        except HiLinkError as e:
+            if e.code not in _SESSION_ERRORS:
+                raise
+            self._refresh_session()
+            root = self._request(path, self._session_headers)
+        return {child.tag: (child.text or "") for child in root}
+
+    def close(self):
+        """Closes the underlying HTTP connection."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def _parse_number(value):
+    """Extracts the numeric part of HiLink values such as '-95dBm' or '&gt;=-51dBm'."""
+    match = _NUMBER_RE.search(value or "")
+    if not match:
+        return None
+    number = float(match.group())
+    return int(number) if number.is_integer() else number
+
+
+class ModemMonitor:
+    """
+    Periodically polls the 4G dongle for signal quality, band, network mode and
+    traffic counters. The latest snapshot is cached and exposed through get_metrics().
+    """
+
+    # Endpoint -> refresh interval in seconds. Slow changing data is polled less often.
+    _ENDPOINTS = {
+        "/api/device/signal": 0.0,
+        "/api/monitoring/status": 0.0,
+        "/api/monitoring/traffic-statistics": 0.0,
+        "/api/net/net-mode": 60.0,
+    }
+
+    def __init__(self, event_bus, client=None):
+        self._event_bus = event_bus
+        self._shutdown_event = event_bus.get_shutdown_event()
+        self._task = None
+        self._client = client or HiLinkClient(
+            config.MODEM_ADDRESS, config.MODEM_PORT, timeout=config.MODEM_HTTP_TIMEOUT
+        )
+        self._responses = {}
+        self._fetched_at = {}
+        self._metrics = {"available": False}
+        self._poll_count = 0
+        self._poll_time_total = 0.0
+
+    def get_metrics(self):
+        """Returns a copy of the latest cached link metrics without touching the network."""
+        return dict(self._metrics)
+
+    def _poll(self):
+        """Blocking poll of all endpoints that are due. Runs in the executor."""
+        now = time.monotonic()
+        for path, interval in self._ENDPOINTS.items():
+            fetched_at = self._fetched_at.get(path)
+            if fetched_at is None or now - fetched_at >= interval:
+                self._responses[path] = self._client.get(path)
+                self._fetched_at[path] = now
+
+    def _build_metrics(self, poll_ms):
+        signal = self._responses.get("/api/device/signal", {})
+        status = self._responses.get("/api/monitoring/status", {})
+        traffic = self._responses.get("/api/monitoring/traffic-statistics", {})
+        net_mode = self._responses.get("/api/net/net-mode", {})
+
+        network_type = _parse_number(status.get("CurrentNetworkTypeEx") or status.get("CurrentNetworkType"))
+        return {
+            "available": True,
+            "rssi": _parse_number(signal.get("rssi")),
+            "rsrp": _parse_number(signal.get("rsrp")),
+            "rsrq": _parse_number(signal.get("rsrq")),
+            "sinr": _parse_number(signal.get("sinr")),
+            "band": _parse_number(signal.get("band")),
+            "cell_id": signal.get("cell_id"),
+            "network_type": _NETWORK_TYPES.get(network_type, str(network_type)),
+            "network_mode": net_mode.get("NetworkMode"),
+            "signal_icon": _parse_number(status.get("SignalIcon")),
+            "connected": status.get("ConnectionStatus") == "901",
+            "download_rate": _parse_number(traffic.get("CurrentDownloadRate")),
+            "upload_rate": _parse_number(traffic.get("CurrentUploadRate")),
+            "total_download": _parse_number(traffic.get("TotalDownload")),
+            "total_upload": _parse_number(traffic.get("TotalUpload")),
+            "poll_ms": poll_ms,
+            "poll_avg_ms": self._poll_time_total / self._poll_count * 1000,
+            "timestamp": time.monotonic(),
+        }
+
+    async def run(self):
+        """
+        The main loop that polls the dongle and refreshes the cached metrics.
+        """
+        loop = asyncio.get_running_loop()
+        while not self._shutdown_event.is_set():
+            try:
+                started = time.perf_counter()
+                await loop.run_in_executor(None, self._poll)
+                elapsed = time.perf_counter() - started
+                self._poll_count += 1
+                self._poll_time_total += elapsed
+                self._metrics = self._build_metrics(elapsed * 1000)
+                logger.debug("Modem metrics: %s", self._metrics)
+            except asyncio.CancelledError:
+                break
+            except (OSError, http.client.HTTPException, HiLinkError, ElementTree.ParseError) as e:
+                if self._metrics["available"]:
+                    logger.warning(f"4G dongle web API is not reachable: {e}")
+                self._metrics = {"available": False}
+            except Exception:
+                logger.exception("Error in ModemMonitor loop:")
+
+            try:
+                await asyncio.sleep(config.MODEM_POLL_INTERVAL)
+            except asyncio.CancelledError:
+                break
+
+        self._client.close()
+        logger.info("ModemMonitor stopped.")
+
+    def start(self):
+        """Starts the modem monitor's run loop as an asyncio task."""
+        self._task = asyncio.create_task(self.run())
+        return self._task
@@ -4,6 +4,7 @@ import psutil
 import socket
 
 from core import config
+from core.log import SUPPRESS_REPEATS
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +19,18 @@ class NetworkManager:
         self._shutdown_event = event_bus.get_shutdown_event()
         self._task = None
         self._wg_is_up = False
+        self._home_network_active = False
+        self._dongle_active = False
+        self._internet_active = False
+
+    def get_status(self):
+        """Returns the link state observed by the last loop iteration."""
+        return {
+            "home_network": self._home_network_active,
+            "dongle": self._dongle_active,
+            "internet": self._internet_active,
+            "wireguard": self._wg_is_up,
+        }
 
     async def _check_connectivity(self, ip):
         """Checks for connectivity to a given IP address."""
@@ -55,7 +68,7 @@ class NetworkManager:
                 self._wg_is_up = True
                 logger.info("WireGuard tunnel started.")
             else:
-                logger.error(f"Failed to start WireGuard tunnel: {stderr.decode()}")
+                logger.error(f"Failed to start WireGuard tunnel: {stderr.decode()}", extra=SUPPRESS_REPEATS)
         elif not up and self._wg_is_up:
             logger.info("Stopping WireGuard tunnel...")
             proc = await asyncio.create_subprocess_shell(
@@ -80,6 +93,7 @@ class NetworkManager:
                 home_network_active = any(
                     ip.startswith(config.HOME_NETWORK_INTERFACE_PREFIX) for ip in interfaces.values()
                 )
+                self._home_network_active = home_network_active
 
                 if home_network_active:
                     logger.debug("Home network is active.")
@@ -88,17 +102,20 @@ class NetworkManager:
                     dongle_active = any(
                         ip == config.DONGLE_INTERFACE_ADDRESS for ip in interfaces.values()
                     )
+                    self._dongle_active = dongle_active
                     if dongle_active:
                         logger.debug("4G dongle is active.")
-                        if await self._check_connectivity(config.CONNECTIVITY_CHECK_IP):
+                        self._internet_active = await self._check_connectivity(config.CONNECTIVITY_CHECK_IP)
+                        if self._internet_active:
                             await self._manage_wireguard(up=True)
                         else:
                             logger.warning(
-                                "4G dongle is active, but no internet connectivity."
+                                "4G dongle is active, but no internet connectivity.", extra=SUPPRESS_REPEATS
                             )
                             await self._manage_wireguard(up=False)
                             await asyncio.sleep(5)
                     else:
+                        self._internet_active = False
                         logger.info("4G dongle is not active. No internet connectivity.")
                         await self._manage_wireguard(up=False)
                         await asyncio.sleep(5)
@@ -0,0 +1,98 @@
+"""
+Optional real-time control path. Receives MAVLink on a dedicated thread, applies
+MANUAL_CONTROL straight to the servos and hands every message over to the asyncio
+event bus through a bounded deque.
+"""
+import logging
+import os
+import threading
+
+from collections import deque
+
+from core import config
+
+logger = logging.getLogger(__name__)
+
+
+class RealtimeControlLoop:
+    """
+    Runs the receive -> MANUAL_CONTROL decode -> servo write chain on its own thread,
+    optionally pinned to a CPU core and scheduled with SCHED_FIFO. Replaces the
+    ManualControlConsumer when enabled.
+    """
+
+    def __init__(self, event_bus, hardware_controller):
+        self._connection = event_bus.get_connection()
+        self._hardware = hardware_controller
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._commands_applied = 0
+        self._loop_count = 0
+
+        # When full, the oldest message is dropped instead of blocking the control thread.
+        self._inbox = deque(maxlen=config.CONTROL_THREAD_INBOX_SIZE)
+        event_bus.attach_receiver(self._inbox)
+
+    def get_commands_applied(self):
+        """Returns the number of MANUAL_CONTROL messages applied to the servos."""
+        return self._commands_applied
+
+    def get_progress(self):
+        """
+        Returns the number of control thread loop iterations, for the liveness watchdog.
+        The receive timeout keeps the loop turning even without incoming messages.
+        """
+        return self._loop_count
+
+    def _apply_scheduling(self):
+        """Pins the calling thread to a core and raises its priority, if configured."""
+        if config.CONTROL_THREAD_CPU is not None:
+            try:
+                # On Linux, pid 0 refers to the calling thread.
+                os.sched_setaffinity(0, {config.CONTROL_THREAD_CPU})
+                logger.info(f"Control thread pinned to CPU {config.CONTROL_THREAD_CPU}.")
+            except (AttributeError, OSError) as e:
+                logger.warning(f"Failed to pin control thread to CPU {config.CONTROL_THREAD_CPU}: {e}")
+
+        if config.CONTROL_THREAD_FIFO_PRIORITY > 0:
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(config.CONTROL_THREAD_FIFO_PRIORITY))
+                logger.info(f"Control thread running with SCHED_FIFO priority {config.CONTROL_THREAD_FIFO_PRIORITY}.")
+            except (AttributeError, OSError) as e:
+                # Requires CAP_SYS_NICE or a matching RLIMIT_RTPRIO.
+                logger.warning(f"Failed to enable SCHED_FIFO for the control thread: {e}")
+
+    def _run(self):
+        """
+        The control thread loop. Blocks on the connection instead of polling, so a
+        command is applied as soon as it arrives.
+        """
+        self._apply_scheduling()
+        logger.info("Real-time control thread started.")
+        while not self._stop_event.is_set():
+            self._loop_count += 1
+            try:
+                msg = self._connection.recv_match(blocking=True, timeout=config.CONTROL_THREAD_RECV_TIMEOUT)
+                if msg is None:
+                    continue
+                if msg.get_type() == 'MANUAL_CONTROL':
+                    self._hardware.apply_control(msg.r, msg.z)
+                    self._commands_applied += 1
+                self._inbox.append(msg)
+            except Exception:
+                logger.exception("Error in real-time control thread:")
+                self._stop_event.wait(config.ERROR_LOOP_SLEEP)
+
+        logger.info("Real-time control thread stopped.")
+
+    def start(self):
+        """Starts the control thread."""
+        if not self._thread:
+            self._thread = threading.Thread(target=self._run, name="crawler-control", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Stops the control thread and waits for it to exit."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
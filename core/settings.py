@@ -0,0 +1,266 @@
+"""
+Runtime configuration layer. The values in core/config.py are the defaults; they
+can be overridden from a JSON file and from CRAWLER_<NAME> environment variables.
+The file is reloaded on SIGHUP or when it changes, and subscribed components
+apply the new values live.
+"""
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+
+from core import config
+
+logger = logging.getLogger(__name__)
+
+_ENV_PREFIX = "CRAWLER_"
+
+# Keys whose default is None need an explicit type.
+_TYPES = {
+    "CONTROL_THREAD_CPU": int,
+}
+
+# Keys that accept None (JSON null, or "none" in the environment) besides their type.
+_NULLABLE = {"CONTROL_THREAD_CPU", "GIMBAL_ROLL_PIN", "GIMBAL_PITCH_PIN", "GIMBAL_YAW_PIN"}
+
+# Keys that are only read at startup. A changed value is kept out of config until
+# the next start, so live components never see values the hardware was not set up with.
+_RESTART_REQUIRED = {
+    "ARDUINO_PORT", "STEERING_PIN", "THROTTLE_PIN", "GIMBAL_ROLL_PIN", "GIMBAL_PITCH_PIN", "GIMBAL_YAW_PIN",
+    "MAVLINK_SOURCE_SYSTEM", "MAVLINK_SOURCE_COMPONENT", "MAVLINK_DIALECT",
+    "CONTROL_THREAD_ENABLED", "CONTROL_THREAD_CPU", "CONTROL_THREAD_FIFO_PRIORITY", "CONTROL_THREAD_INBOX_SIZE",
+    "MODEM_PORT", "MODEM_HTTP_TIMEOUT", "LOG_QUEUE_SIZE",
+    # The video service and the FEC stage have to match, so they change together.
+    "VIDEO_SERVICE_NAME", "VIDEO_FEC_ENABLED", "VIDEO_FEC_INPUT_PORT",
+    "SUPERVISOR_RUNTIME_DIR", "SHARED_STATE_FILE", "SUPERVISOR_CONTROL_SOCKET", "SUPERVISOR_HOUSEKEEPING_SOCKET",
+    "SUPERVISOR_NOTIFY_SOCKET", "CONFIG_FILE",
+}
+
+_IP_KEYS = {"GROUND_CONTROL_STATION_IP", "DONGLE_INTERFACE_ADDRESS", "CONNECTIVITY_CHECK_IP", "MODEM_ADDRESS"}
+_NETWORK_PORT_KEYS = {"MAVLINK_PORT", "MODEM_PORT", "VIDEO_FEC_INPUT_PORT", "VIDEO_FEC_PORT"}
+_LOG_LEVELS = {"DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"}
+
+# Media and parity packets of a FEC group are distinct GF(256) elements.
+_FEC_MAX_SYMBOLS = 256
+# The video pipelines in deploy/: straight to the GCS, or through the crawler's FEC stage.
+_VIDEO_SERVICE = "crawler-video.service"
+_VIDEO_FEC_SERVICE = "crawler-video-fec.service"
+
+
+class ConfigError(ValueError):
+    """Raised when a configuration source contains invalid values."""
+
+
+def _validate_key(key, value):
+    """Returns an error message for a single invalid value, or None."""
+    if key.endswith("_PULSE") and not 500 <= value <= 2500:
+        return "must be between 500 and 2500us"
+    if key.endswith("_PIN") and not 0 <= value <= 19:
+        return "must be an Arduino pin number (0-19)"
+    if key.endswith(("_SLEEP", "_INTERVAL", "_TIMEOUT", "_DELAY", "_RATE")) and value <= 0:
+        return "must be positive"
+    if key.startswith("GIMBAL_") and key.endswith("_RANGE") and not 0 < value <= 180:
+        return "must be between 0 and 180 degrees"
+    if key.startswith("GIMBAL_AUX_") and not 0 <= value <= 6:
+        return "must be an aux axis number (1-6) or 0"
+    if key in _NETWORK_PORT_KEYS and not 0 < value < 65536:
+        return "must be a valid UDP/TCP port"
+    if key in _IP_KEYS:
+        try:
+            ipaddress.ip_address(value)
+        except ValueError:
+            return "must be an IP address"
+    if key in ("LOG_REPEAT_WINDOW", "VIDEO_FEC_PARITY") and value < 0:
+        return "must not be negative"
+    if key in ("VIDEO_FEC_GROUP_SIZE", "VIDEO_PACING_BURST", "VIDEO_PACING_QUEUE_SIZE") and value < 1:
+        return "must be at least 1"
+    if key == "LOG_LEVEL" and value not in _LOG_LEVELS:
+        return f"must be one of {sorted(_LOG_LEVELS)}"
+    return None
+
+
+def _validate_all(values):
+    """Returns the cross-field validation errors."""
+    errors = []
+    for servo in ("STEERING", "THROTTLE"):
+        low, high = values[f"{servo}_MIN_PULSE"], values[f"{servo}_MAX_PULSE"]
+        if low >= high:
+            errors.append(f"{servo}_MIN_PULSE must be lower than {servo}_MAX_PULSE")
+        if not low <= values[f"{servo}_FAILSAFE_PULSE"] <= high:
+            errors.append(f"{servo}_FAILSAFE_PULSE must be within {servo}_MIN_PULSE and {servo}_MAX_PULSE")
+    if values["GIMBAL_MIN_PULSE"] >= values["GIMBAL_MAX_PULSE"]:
+        errors.append("GIMBAL_MIN_PULSE must be lower than GIMBAL_MAX_PULSE")
+    if values["FAILSAFE_LOOP_INTERVAL"] >= values["FAILSAFE_INTERVAL"]:
+        errors.append("FAILSAFE_LOOP_INTERVAL must be shorter than FAILSAFE_INTERVAL")
+    for key in ("WATCHDOG_CHECK_INTERVAL", "FAILSAFE_LOOP_INTERVAL", "CONTROL_THREAD_RECV_TIMEOUT"):
+        if values[key] >= values["WATCHDOG_STALL_TIMEOUT"]:
+            errors.append(f"{key} must be shorter than WATCHDOG_STALL_TIMEOUT")
+    if values["VIDEO_FEC_GROUP_SIZE"] + values["VIDEO_FEC_PARITY"] > _FEC_MAX_SYMBOLS:
+        errors.append(f"VIDEO_FEC_GROUP_SIZE + VIDEO_FEC_PARITY must be at most {_FEC_MAX_SYMBOLS}")
+    if values["VIDEO_FEC_ENABLED"] and values["VIDEO_SERVICE_NAME"] == _VIDEO_SERVICE:
+        errors.append(f"VIDEO_FEC_ENABLED needs VIDEO_SERVICE_NAME = {_VIDEO_FEC_SERVICE}, "
+                      f"{_VIDEO_SERVICE} sends the video around the FEC stage")
+    if not values["VIDEO_FEC_ENABLED"] and values["VIDEO_SERVICE_NAME"] == _VIDEO_FEC_SERVICE:
+        errors.append(f"VIDEO_SERVICE_NAME = {_VIDEO_FEC_SERVICE} needs VIDEO_FEC_ENABLED")
+    return errors
+
+
+class ConfigManager:
+    """
+    Loads, validates and applies runtime configuration. A reload is all or nothing:
+    if any value is invalid, the running configuration is kept unchanged.
+    """
+
+    def __init__(self):
+        self._defaults = {key: getattr(config, key) for key in dir(config) if key.isupper()}
+        self._types = {key: _TYPES.get(key, type(value)) for key, value in self._defaults.items()}
+        self._subscribers = []
+        self._file_mtime = None
+        self._task = None
+        self._shutdown_event = None
+        # Restart-required values that changed after the first load, not applied yet.
+        self._pending_restart = {}
+        self._loaded = False
+
+    def subscribe(self, keys, callback):
+        """
+        Registers a callback for changes of the given keys.
+        :param keys: Iterable of configuration key names.
+        :param callback: Called with a {key: new_value} dict of the changed subscribed keys.
+        """
+        self._subscribers.append((frozenset(keys), callback))
+
+    def _coerce(self, key, value):
+        """Converts a file or environment value to the type of the key."""
+        expected = self._types[key]
+        if value is None and key in _NULLABLE:
+            return None
+        if isinstance(value, str) and expected is not str:
+            if value.lower() in ("none", "null") and key in _NULLABLE:
+                return None
+            if expected is bool:
+                if value.lower() not in ("1", "0", "true", "false", "yes", "no"):
+                    raise ConfigError(f"{key}: expected a boolean, got '{value}'")
+                return value.lower() in ("1", "true", "yes")
+            try:
+                return expected(value)
+            except ValueError:
+                raise ConfigError(f"{key}: expected {expected.__name__}, got '{value}'")
+        if expected is float and isinstance(value, int) and not isinstance(value, bool):
+            return float(value)
+        if type(value) is not expected:
+            raise ConfigError(f"{key}: expected {expected.__name__}, got {type(value).__name__}")
+        return value
+
+    def _read_file(self):
+        """Returns the overrides from the config file, or an empty dict if there is none."""
+        try:
+            with open(config.CONFIG_FILE) as f:
+                overrides = json.load(f)
+            self._file_mtime = os.stat(config.CONFIG_FILE).st_mtime
+        except FileNotFoundError:
+            self._file_mtime = None
+            return {}
+        except json.JSONDecodeError as e:
+            raise ConfigError(f"{config.CONFIG_FILE}: {e}")
+        if not isinstance(overrides, dict):
+            raise ConfigError(f"{config.CONFIG_FILE}: expected a JSON object")
+        return overrides
+
+    def _resolve(self):
+        """Builds and validates the full configuration: defaults < file < environment."""
+        overrides = self._read_file()
+        overrides.update({
+            name[len(_ENV_PREFIX):]: value for name, value in os.environ.items()
+            if name.startswith(_ENV_PREFIX) and name[len(_ENV_PREFIX):] in self._defaults
+        })
+
+        values = dict(self._defaults)
+        errors = []
+        for key, value in overrides.items():
+            if key not in self._defaults:
+                errors.append(f"{key}: unknown setting")
+                continue
+            try:
+                values[key] = self._coerce(key, value)
+            except ConfigError as e:
+                errors.append(str(e))
+                continue
+            if values[key] is not None:
+                error = _validate_key(key, values[key])
+                if error:
+                    errors.append(f"{key}: {error}")
+
+        errors += _validate_all(values) if not errors else []
+        if errors:
+            raise ConfigError("; ".join(errors))
+        return values
+
+    def reload(self):
+        """
+        Reloads the configuration and notifies subscribers of changed keys.
+        :return: True if the new configuration was applied.
+        """
+        try:
+            values = self._resolve()
+        except ConfigError as e:
+            logger.error(f"Invalid configuration, keeping the current one: {e}")
+            return False
+
+        changes = {key: value for key, value in values.items() if getattr(config, key) != value}
+        if self._loaded:
+            pending = {key: changes.pop(key) for key in _RESTART_REQUIRED & changes.keys()}
+            for key, value in pending.items():
+                if key not in self._pending_restart or self._pending_restart[key] != value:
+                    logger.warning(f"Config {key} = {value!r} takes effect after a restart.")
+            self._pending_restart = pending
+        self._loaded = True
+        if not changes:
+            return True
+
+        for key, value in changes.items():
+            setattr(config, key, value)
+            logger.info(f"Config {key} = {value!r}")
+
+        for keys, callback in self._subscribers:
+            subscribed_changes = {key: value for key, value in changes.items() if key in keys}
+            if subscribed_changes:
+                try:
+                    callback(subscribed_changes)
+                except Exception:
+                    logger.exception(f"Error applying config change {subscribed_changes}:")
+        return True
+
+    def attach(self, event_bus):
+        """Binds the file watcher to the shutdown event of the event bus. Call before start()."""
+        self._shutdown_event = event_bus.get_shutdown_event()
+
+    async def run(self):
+        """
+        Watches the config file and reloads it when it changes.
+        """
+        while not self._shutdown_event.is_set():
+            try:
+                await asyncio.sleep(config.CONFIG_WATCH_INTERVAL)
+                try:
+                    mtime = os.stat(config.CONFIG_FILE).st_mtime
+                except FileNotFoundError:
+                    mtime = None
+                if mtime != self._file_mtime:
+                    logger.info(f"Config file {config.CONFIG_FILE} changed. Reloading.")
+                    self.reload()
+                    # Do not retry a broken file until it changes again.
+                    self._file_mtime = mtime
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.exception("Error in ConfigManager loop:")
+
+    def start(self):
+        """Starts the config file watcher as an asyncio task."""
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+
+config_manager = ConfigManager()
@@ -0,0 +1,157 @@
+"""
+Fixed-layout shared-memory block used to exchange link and health state between
+the control and the housekeeping processes in supervisor mode.
+"""
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import time
+
+from core import config
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"CRWL"
+_VERSION = 1
+_HEADER = struct.Struct("<4sH2x")
+
+# Every section has a single writer process and is guarded by its own sequence
+# counter (seqlock): odd while a write is in progress, even once it is complete.
+# Timestamps are CLOCK_MONOTONIC seconds, which is shared by all processes.
+_SECTIONS = {
+    "control": (
+        struct.Struct("<Id?"),
+        ("pid", "heartbeat", "failsafe"),
+    ),
+    "housekeeping": (
+        struct.Struct("<Id??????hhhhH"),
+        ("pid", "heartbeat", "home_network", "dongle", "internet", "wireguard", "video",
+         "modem", "rssi", "rsrp", "rsrq", "sinr", "band"),
+    ),
+}
+_SEQ = struct.Struct("<I")
+_READ_ATTEMPTS = 100
+
+
+class SharedState:
+    """
+    Memory-mapped state block. Any process can open it; the file is created and
+    zeroed on first use, so either side can be (re)started on its own.
+    """
+
+    def __init__(self, path=None):
+        self._path = path or os.path.join(config.SUPERVISOR_RUNTIME_DIR, config.SHARED_STATE_FILE)
+
+        self._offsets = {}
+        offset = _HEADER.size
+        for section, (layout, _) in _SECTIONS.items():
+            self._offsets[section] = offset
+            offset += _SEQ.size + layout.size
+        self._size = offset
+
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < self._size:
+                os.ftruncate(fd, self._size)
+            self._mmap = mmap.mmap(fd, self._size)
+        finally:
+            os.close(fd)
+
+        if self._mmap[:4] != _MAGIC:
+            _HEADER.pack_into(self._mmap, 0, _MAGIC, _VERSION)
+
+    @staticmethod
+    def reset(path=None):
+        """Removes a stale state file so that the next open starts from zeroes."""
+        path = path or os.path.join(config.SUPERVISOR_RUNTIME_DIR, config.SHARED_STATE_FILE)
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def write(self, section, **fields):
+        """
+        Writes a section. Only the process owning the section may call this.
+        Missing fields are written as zero.
+        """
+        layout, names = _SECTIONS[section]
+        offset = self._offsets[section]
+        data = layout.pack(*(fields.get(name) or 0 for name in names))
+        # Forced odd, so that a writer that died mid-write is recovered on restart.
+        seq = _SEQ.unpack_from(self._mmap, offset)[0] + 1 | 1
+
+        _SEQ.pack_into(self._mmap, offset, seq)
+        start = offset + _SEQ.size
+        self._mmap[start:start + layout.size] = data
+        _SEQ.pack_into(self._mmap, offset, seq + 1)
+
+    def read(self, section):
+        """Returns a consistent snapshot of a section as a dictionary."""
+        layout, names = _SECTIONS[section]
+        offset = self._offsets[section]
+        for _ in range(_READ_ATTEMPTS):
+            seq_before = _SEQ.unpack_from(self._mmap, offset)[0]
+            values = layout.unpack_from(self._mmap, offset + _SEQ.size)
+            if not seq_before & 1 and _SEQ.unpack_from(self._mmap, offset)[0] == seq_before:
+                break
+            time.sleep(0)
+        # If the writer died mid-write the last (possibly torn) values are returned.
+        return dict(zip(names, values))
+
+    def close(self):
+        """Unmaps the state block. The backing file is kept for the other processes."""
+        self._mmap.close()
+
+
+class SharedStatePublisher:
+    """
+    Periodically writes this process' section of the shared state together with a
+    liveness heartbeat, and watches the section owned by the peer process.
+    """
+
+    def __init__(self, event_bus, shared_state, section, collect):
+        """
+        :param shared_state: The SharedState block.
+        :param section: The section owned by this process ('control' or 'housekeeping').
+        :param collect: Callable returning the dictionary of fields to publish.
+        """
+        self._shared_state = shared_state
+        self._section = section
+        self._peer = "housekeeping" if section == "control" else "control"
+        self._collect = collect
+        self._shutdown_event = event_bus.get_shutdown_event()
+        self._task = None
+        self._peer_alive = None
+
+    def _check_peer(self, now):
+        """Logs when the peer process stops or resumes updating its section."""
+        peer = self._shared_state.read(self._peer)
+        alive = now - peer["heartbeat"] <= config.SUPERVISOR_STALE_TIMEOUT
+        if alive and not self._peer_alive:
+            logger.info(f"{self._peer} process is alive (pid {peer['pid']}): {peer}")
+        elif not alive and self._peer_alive:
+            logger.warning(f"{self._peer} process state is stale.")
+        self._peer_alive = alive
+
+    async def run(self):
+        """
+        The main loop that publishes the shared state.
+        """
+        while not self._shutdown_event.is_set():
+            try:
+                now = time.monotonic()
+                self._shared_state.write(self._section, pid=os.getpid(), heartbeat=now, **self._collect())
+                self._check_peer(now)
+                await asyncio.sleep(config.SHARED_STATE_LOOP_SLEEP)
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.exception("Error in SharedStatePublisher loop:")
+                await asyncio.sleep(config.ERROR_LOOP_SLEEP)
+
+    def start(self):
+        """Starts the publisher's run loop as an asyncio task."""
+        self._task = asyncio.create_task(self.run())
+        return self._task
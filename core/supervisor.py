@@ -0,0 +1,216 @@
+"""
+Supervisor mode: runs the control path and the housekeeping components in separate
+processes and restarts each one independently.
+
+The supervisor is the process systemd watches. The control process sends its
+watchdog notifications to the supervisor instead, which pings systemd while the
+control path is live and also while a control restart is in progress. A stall
+reported by the control process restarts only that process.
+"""
+import asyncio
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+from core import config
+from core.shared_state import SharedState
+from core.watchdog import sd_notify, watchdog_interval
+
+logger = logging.getLogger(__name__)
+
+ROLES = ("control", "housekeeping")
+
+
+class Supervisor:
+    """
+    Spawns one 'python -m core.main --role <role>' process per role. A process is
+    restarted when it exits unexpectedly or stops updating its shared-state heartbeat.
+    A clean exit of the control process (e.g. a shutdown command from the GCS) stops
+    the whole application.
+    """
+
+    def __init__(self):
+        self._processes = {}
+        self._shutdown_event = asyncio.Event()
+        SharedState.reset()
+        self._shared_state = SharedState()
+
+        self._notify_path = os.path.join(config.SUPERVISOR_RUNTIME_DIR, config.SUPERVISOR_NOTIFY_SOCKET)
+        try:
+            os.unlink(self._notify_path)
+        except FileNotFoundError:
+            pass
+        self._notify_socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._notify_socket.bind(self._notify_path)
+        self._notify_socket.setblocking(False)
+        # Control path state, as reported by the control process
+        self._control_live = False
+        self._control_last_ping = 0.0
+        self._control_down_since = time.monotonic()
+        self._ready_sent = False
+
+    def get_shutdown_event(self):
+        """Returns the shutdown event object."""
+        return self._shutdown_event
+
+    async def _spawn(self, role):
+        env = dict(os.environ)
+        for name in ("NOTIFY_SOCKET", "WATCHDOG_USEC", "WATCHDOG_PID"):
+            env.pop(name, None)
+        if role == "control":
+            env["NOTIFY_SOCKET"] = self._notify_path
+            if "WATCHDOG_USEC" in os.environ:
+                env["WATCHDOG_USEC"] = os.environ["WATCHDOG_USEC"]
+        process = await asyncio.create_subprocess_exec(sys.executable, "-m", "core.main", "--role", role, env=env)
+        logger.info(f"Started {role} process (pid {process.pid}).")
+        return process
+
+    async def _supervise(self, role):
+        """Keeps a single role process running until shutdown."""
+        while not self._shutdown_event.is_set():
+            process = await self._spawn(role)
+            self._processes[role] = process
+            started = time.monotonic()
+            watchdog = asyncio.create_task(self._watch_heartbeat(role, process, started))
+            try:
+                returncode = await process.wait()
+            finally:
+                watchdog.cancel()
+            if role == "control":
+                self._set_control_down()
+
+            if self._shutdown_event.is_set():
+                break
+            if role == "control" and returncode == 0:
+                logger.warning("Control process exited cleanly. Shutting down.")
+                self._shutdown_event.set()
+                break
+
+            logger.error(f"{role} process exited with code {returncode}. Restarting in {config.SUPERVISOR_RESTART_DELAY}s.")
+            await asyncio.sleep(config.SUPERVISOR_RESTART_DELAY)
+
+    async def _watch_heartbeat(self, role, process, started):
+        """Kills a process whose shared-state heartbeat has gone stale."""
+        while True:
+            await asyncio.sleep(config.SUPERVISOR_STALE_TIMEOUT)
+            state = self._shared_state.read(role)
+            now = time.monotonic()
+            if state["pid"] == process.pid:
+                stale = now - state["heartbeat"] > config.SUPERVISOR_STALE_TIMEOUT
+            else:
+                # The process has not published its first heartbeat yet (imports, Arduino handshake).
+                stale = now - started > config.SUPERVISOR_STARTUP_TIMEOUT
+            if stale:
+                logger.error(f"{role} process (pid {process.pid}) is not responding. Killing it.")
+                process.kill()
+                return
+
+    def _set_control_down(self):
+        self._control_live = False
+        if self._control_down_since is None:
+            self._control_down_since = time.monotonic()
+
+    def _restart_control(self, reason):
+        process = self._processes.get("control")
+        if process and process.returncode is None:
+            logger.error(f"Control process (pid {process.pid}) {reason}. Restarting it.")
+            process.kill()
+        self._set_control_down()
+
+    def _handle_notification(self, state):
+        """Acts on a systemd notification sent by the control process."""
+        if state == "READY=1":
+            self._control_live = True
+            self._control_last_ping = time.monotonic()
+            self._control_down_since = None
+            if not self._ready_sent:
+                self._ready_sent = True
+                sd_notify("READY=1")
+            else:
+                logger.info("Control path is live again.")
+        elif state == "WATCHDOG=1":
+            self._control_last_ping = time.monotonic()
+        elif state == "WATCHDOG=trigger":
+            self._restart_control("reported a stalled control path")
+        elif state.startswith("STATUS="):
+            sd_notify(state)
+
+    async def _relay_notifications(self):
+        loop = asyncio.get_running_loop()
+        while not self._shutdown_event.is_set():
+            try:
+                data = await loop.sock_recv(self._notify_socket, 4096)
+                for state in data.decode().splitlines():
+                    self._handle_notification(state)
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.exception("Error relaying control process notifications:")
+                await asyncio.sleep(config.ERROR_LOOP_SLEEP)
+
+    async def _ping_watchdog(self):
+        """
+        Pings the systemd watchdog while the control path is live, or while a control
+        restart is still within its time budget. Once the budget runs out systemd
+        restarts the whole service.
+        """
+        interval = watchdog_interval()
+        if not interval:
+            return
+        timeout = interval * 4
+        restart_budget = config.SUPERVISOR_RESTART_DELAY + config.SUPERVISOR_STARTUP_TIMEOUT
+        while not self._shutdown_event.is_set():
+            try:
+                await asyncio.sleep(interval)
+                now = time.monotonic()
+                if self._control_live and now - self._control_last_ping > timeout:
+                    self._restart_control("stopped pinging the watchdog")
+                if self._control_live or now - self._control_down_since < restart_budget:
+                    sd_notify("WATCHDOG=1")
+            except asyncio.CancelledError:
+                break
+
+    def _reload_processes(self):
+        """Forwards SIGHUP so that every process reloads its runtime configuration."""
+        for process in self._processes.values():
+            if process.returncode is None:
+                process.send_signal(signal.SIGHUP)
+
+    def _stop_processes(self):
+        for role, process in self._processes.items():
+            if process.returncode is None:
+                logger.info(f"Stopping {role} process (pid {process.pid}).")
+                process.send_signal(signal.SIGTERM)
+
+    async def run(self):
+        """
+        Runs the supervised processes until shutdown is requested.
+        """
+        loop = asyncio.get_running_loop()
+
+        def signal_handler():
+            logger.warning("Shutdown signal received.")
+            self._shutdown_event.set()
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, signal_handler)
+        loop.add_signal_handler(signal.SIGHUP, self._reload_processes)
+
+        tasks = [asyncio.create_task(self._supervise(role)) for role in ROLES]
+        tasks += [asyncio.create_task(self._relay_notifications()), asyncio.create_task(self._ping_watchdog())]
+        await self._shutdown_event.wait()
+
+        sd_notify("STOPPING=1")
+        self._stop_processes()
+        await asyncio.gather(*(p.wait() for p in self._processes.values()), return_exceptions=True)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        self._shared_state.close()
+        self._notify_socket.close()
+        os.unlink(self._notify_path)
+        logger.info("Supervisor shutdown complete.")
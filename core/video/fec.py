@@ -0,0 +1,346 @@
+"""
+Forward error correction for the RTP video stream.
+
+Media packets are sent unchanged. After each group of up to VIDEO_FEC_GROUP_SIZE
+consecutive RTP packets, up to VIDEO_FEC_PARITY parity packets are added. Groups
+span frame boundaries; one that is not full after VIDEO_FEC_GROUP_DELAY is closed
+early, which bounds the time a lost packet waits for its parity. Any lost packets
+of a group can be rebuilt as long as no more packets are lost than parity packets
+arrive.
+
+The code is a systematic Reed-Solomon erasure code over GF(256) built from a Cauchy
+matrix. Its first row is normalized to all ones, so a single parity packet is the
+plain XOR of the group. Parity packets start with a version byte whose top bits
+are 00, which tells them apart from RTP version 2 packets (top bits 10).
+"""
+import math
+import struct
+
+from functools import lru_cache
+
+from core import config
+
+FEC_VERSION = 1
+# version, base RTP sequence number, media packets in the group, parity packets, parity index
+PARITY_HEADER = struct.Struct(">BHBBB")
+_LENGTH = struct.Struct(">H")
+_RTP_HEADER_SIZE = 12
+
+# Rows and columns of the Cauchy matrix use distinct GF(256) elements. core/settings.py
+# checks VIDEO_FEC_GROUP_SIZE + VIDEO_FEC_PARITY against the same limit.
+MAX_SYMBOLS = 256
+
+# -- GF(256) arithmetic, primitive polynomial x^8 + x^4 + x^3 + x^2 + 1
+_EXP = [0] * 512
+_LOG = [0] * 256
+_value = 1
+for _power in range(255):
+    _EXP[_power] = _value
+    _LOG[_value] = _power
+    _value <<= 1
+    if _value & 0x100:
+        _value ^= 0x11d
+for _power in range(255, 512):
+    _EXP[_power] = _EXP[_power - 255]
+
+
+def _mul(a, b):
+    if a == 0 or b == 0:
+        return 0
+    return _EXP[_LOG[a] + _LOG[b]]
+
+
+def _inv(a):
+    return _EXP[255 - _LOG[a]]
+
+
+@lru_cache(maxsize=None)
+def _mul_table(c):
+    """Translation table that multiplies every byte of a bytes object by c."""
+    return bytes(_mul(c, b) for b in range(256))
+
+
+@lru_cache(maxsize=None)
+def _coefficient(row, column):
+    """
+    Coefficient of media packet `column` in parity packet `row`. Cauchy matrix
+    1 / (x_row + y_column) with x_row = 255 - row and y_column = column, with every
+    column scaled so that row 0 is all ones (plain XOR).
+    """
+    def cauchy(r):
+        return _inv((MAX_SYMBOLS - 1 - r) ^ column)
+    return _mul(cauchy(row), _inv(cauchy(0)))
+
+
+def _scaled(symbol, c):
+    """Returns c * symbol as an integer, so symbols can be added with ^."""
+    return int.from_bytes(symbol if c == 1 else symbol.translate(_mul_table(c)), "big")
+
+
+def _symbol(packet, size):
+    """The length prefixed, zero padded packet that the parity is computed over."""
+    return (_LENGTH.pack(len(packet)) + packet).ljust(size, b"\0")
+
+
+def _invert(matrix):
+    """Inverts a square GF(256) matrix with Gauss-Jordan elimination."""
+    size = len(matrix)
+    rows = [list(row) + [int(i == r) for i in range(size)] for r, row in enumerate(matrix)]
+    for column in range(size):
+        pivot = next(r for r in range(column, size) if rows[r][column])
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        scale = _inv(rows[column][column])
+        rows[column] = [_mul(scale, v) for v in rows[column]]
+        for r in range(size):
+            if r != column and rows[r][column]:
+                factor = rows[r][column]
+                rows[r] = [v ^ _mul(factor, p) for v, p in zip(rows[r], rows[column])]
+    return [row[size:] for row in rows]
+
+
+def is_rtp(packet):
+    return len(packet) >= _RTP_HEADER_SIZE and packet[0] >> 6 == 2
+
+
+def rtp_sequence(packet):
+    return _LENGTH.unpack_from(packet, 2)[0]
+
+
+class FecEncoder:
+    """
+    Groups outgoing RTP packets and produces the parity packets of every group.
+    The group size, parity count and delay are read from the config for each new group.
+    """
+
+    def __init__(self):
+        self._group = []
+        self._base_seq = None
+        self._group_size = 0
+        self._parity = 0
+        self._deadline = None
+
+    def _start_group(self, seq, now):
+        self._group = []
+        self._base_seq = seq
+        self._group_size = config.VIDEO_FEC_GROUP_SIZE
+        self._parity = config.VIDEO_FEC_PARITY
+        self._deadline = now + config.VIDEO_FEC_GROUP_DELAY
+
+    def get_deadline(self):
+        """:return: The time the open group has to be closed at, or None if there is none."""
+        return self._deadline if self._group else None
+
+    def flush_expired(self, now):
+        """Closes the open group if its delay has passed. :return: Its parity packets."""
+        if not self._group or now < self._deadline:
+            return []
+        return self.flush()
+
+    def flush(self):
+        """Closes the current group. :return: Its parity packets."""
+        group, self._group = self._group, []
+        if not group or not self._parity:
+            return []
+        # Groups cut short by the delay or a sequence gap get proportionally fewer
+        # parity packets, but always at least one.
+        parity = min(self._parity, math.ceil(self._parity * len(group) / self._group_size))
+
+        size = max(len(packet) for packet in group) + _LENGTH.size
+        symbols = [_symbol(packet, size) for packet in group]
+        parity_packets = []
+        for row in range(parity):
+            value = 0
+            for column, symbol in enumerate(symbols):
+                value ^= _scaled(symbol, _coefficient(row, column))
+            header = PARITY_HEADER.pack(FEC_VERSION, self._base_seq, len(group), parity, row)
+            parity_packets.append(header + value.to_bytes(size, "big"))
+        return parity_packets
+
+    def add(self, packet, now):
+        """
+        Adds an outgoing packet.
+        :param now: time.monotonic() at arrival, starts the delay of a new group.
+        :return: The packets to send: the packet itself and the parity packets of
+                 the group if it is complete.
+        """
+        if not is_rtp(packet):
+            return self.flush() + [packet]
+
+        out = []
+        seq = rtp_sequence(packet)
+        # A sequence gap means the group cannot be described by base + count.
+        if self._group and seq != (self._base_seq + len(self._group)) & 0xffff:
+            out += self.flush()
+        if not self._group:
+            self._start_group(seq, now)
+
+        self._group.append(packet)
+        out.append(packet)
+        if len(self._group) >= self._group_size:
+            out += self.flush()
+        return out
+
+
+class _Group:
+    """Parity packets received for one FEC group."""
+
+    def __init__(self, base_seq, count):
+        self.base_seq = base_seq
+        self.count = count
+        self.parity = {}
+        self.complete = False
+
+    def sequences(self):
+        return [(self.base_seq + i) & 0xffff for i in range(self.count)]
+
+    def contains(self, seq):
+        return (seq - self.base_seq) & 0xffff < self.count
+
+
+class FecDecoder:
+    """
+    Receiver side. Media packets are passed through immediately; parity packets are
+    used to rebuild the missing media packets of their group.
+
+    Loss is counted from the gaps in the media sequence numbers, so packets lost
+    together with all the parity of their group are counted too. A missing packet
+    counts as unrecovered once it is `window` packets behind the newest one.
+    """
+
+    def __init__(self, window=2048):
+        """:param window: Number of recent media packets and groups kept for recovery."""
+        self._window = window
+        self._packets = {}
+        self._groups = {}
+        self._newest_seq = None
+        # Missing sequence numbers, oldest first
+        self._missing = {}
+        # Rebuilt sequence numbers still in the window
+        self._rebuilt = set()
+        self.media_received = 0
+        self.parity_received = 0
+        self.recovered = 0
+        self.unrecovered = 0
+
+    def _track_gap(self, seq):
+        """Notes the packets skipped before a new media packet and expires the old ones."""
+        if self._newest_seq is not None:
+            gap = (seq - self._newest_seq) & 0xffff
+            if gap >= 0x8000:
+                # Reordered or late packet.
+                return
+            if gap <= self._window:
+                for i in range(1, gap):
+                    skipped = (self._newest_seq + i) & 0xffff
+                    # The tail of a group may have been rebuilt before it was noticed missing.
+                    if skipped not in self._packets:
+                        self._missing[skipped] = None
+            # A larger jump is a restarted stream, not loss.
+        self._newest_seq = seq
+        while self._missing:
+            oldest = next(iter(self._missing))
+            if (seq - oldest) & 0xffff < self._window:
+                break
+            del self._missing[oldest]
+            self.unrecovered += 1
+
+    def _remember(self, seq, packet):
+        self._packets[seq] = packet
+        self._missing.pop(seq, None)
+        if len(self._packets) > self._window:
+            # Dicts keep insertion order: drop the oldest packet, and first the groups
+            # that start at or before it.
+            oldest = next(iter(self._packets))
+            while self._groups:
+                key, group = next(iter(self._groups.items()))
+                if (oldest - group.base_seq) & 0xffff >= 0x8000 and len(self._groups) <= self._window:
+                    break
+                del self._groups[key]
+            del self._packets[oldest]
+            self._rebuilt.discard(oldest)
+
+    def _recover(self, group):
+        """Rebuilds the missing packets of a group if enough parity has arrived."""
+        missing = [i for i, seq in enumerate(group.sequences()) if seq not in self._packets]
+        if not missing:
+            group.complete = True
+            return []
+        if len(missing) > len(group.parity):
+            return []
+
+        rows = sorted(group.parity)[:len(missing)]
+        size = len(group.parity[rows[0]])
+        syndromes = []
+        for row in rows:
+            value = int.from_bytes(group.parity[row], "big")
+            for column, seq in enumerate(group.sequences()):
+                if column not in missing:
+                    value ^= _scaled(_symbol(self._packets[seq], size), _coefficient(row, column))
+            syndromes.append(value.to_bytes(size, "big"))
+
+        inverse = _invert([[_coefficient(row, column) for column in missing] for row in rows])
+        recovered = []
+        for i, column in enumerate(missing):
+            value = 0
+            for j, syndrome in enumerate(syndromes):
+                value ^= _scaled(syndrome, inverse[i][j])
+            symbol = value.to_bytes(size, "big")
+            length = _LENGTH.unpack_from(symbol)[0]
+            if length > size - _LENGTH.size:
+                # Corrupt or mismatched parity, give up on this group.
+                return []
+            packet = symbol[_LENGTH.size:_LENGTH.size + length]
+            self._remember(group.sequences()[column], packet)
+            self._rebuilt.add(group.sequences()[column])
+            recovered.append(packet)
+
+        group.complete = True
+        self.recovered += len(recovered)
+        return recovered
+
+    def add(self, datagram):
+        """
+        Processes a received datagram.
+        :return: The media packets to forward: the datagram itself if it is a new
+                 media packet, plus any packets it allowed to recover.
+        """
+        if is_rtp(datagram):
+            seq = rtp_sequence(datagram)
+            if seq in self._packets:
+                # Duplicate, or already rebuilt from parity.
+                if seq in self._rebuilt:
+                    # It was only late, not lost.
+                    self._rebuilt.discard(seq)
+                    self.recovered -= 1
+                return []
+            self.media_received += 1
+            self._track_gap(seq)
+            self._remember(seq, datagram)
+            out = [datagram]
+            # Recovering can drop old groups from the window, so iterate over a copy.
+            pending = [g for g in self._groups.values() if not g.complete and g.parity and g.contains(seq)]
+            for group in pending:
+                if self._groups.get((group.base_seq, group.count)) is group:
+                    out += self._recover(group)
+            return out
+
+        if len(datagram) <= PARITY_HEADER.size or datagram[0] != FEC_VERSION:
+            # Not part of the stream, pass it through untouched.
+            return [datagram]
+
+        version, base_seq, count, parity, row = PARITY_HEADER.unpack_from(datagram)
+        self.parity_received += 1
+        key = (base_seq, count)
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = _Group(base_seq, count)
+        if group.complete:
+            return []
+        group.parity[row] = datagram[PARITY_HEADER.size:]
+        return self._recover(group)
+
+    def close(self):
+        """Counts the still missing packets as unrecovered."""
+        self.unrecovered += len(self._missing)
+        self._missing = {}
+        self._groups = {}
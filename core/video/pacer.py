@@ -0,0 +1,35 @@
+"""
+Token bucket pacing for the outgoing video packets. Spreads the packet bursts of
+large keyframes over time so they do not overflow the 4G modem buffer.
+"""
+from core import config
+
+
+class TokenBucket:
+    """
+    A token bucket in bytes, refilled at VIDEO_PACING_RATE up to VIDEO_PACING_BURST.
+    A packet may be sent whenever the bucket is not empty and may take it into debt,
+    so packets larger than the burst size are never stuck.
+    """
+
+    def __init__(self):
+        self._tokens = config.VIDEO_PACING_BURST
+        self._updated = None
+
+    def _refill(self, now):
+        if self._updated is not None:
+            self._tokens = min(config.VIDEO_PACING_BURST,
+                               self._tokens + (now - self._updated) * config.VIDEO_PACING_RATE)
+        self._updated = now
+
+    def get_delay(self, now):
+        """Returns how long to wait in seconds before the next packet may be sent."""
+        self._refill(now)
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / config.VIDEO_PACING_RATE
+
+    def consume(self, size, now):
+        """Takes a sent packet of the given size in bytes out of the bucket."""
+        self._refill(now)
+        self._tokens -= size
@@ -0,0 +1,147 @@
+"""
+GCS side of the video FEC stage. Receives the media and parity packets sent by
+VideoFecSender, rebuilds the lost media packets and forwards the plain RTP stream
+to the video player (QGC listens on UDP 5000 by default).
+
+Usage: python -m core.video.receiver [--port 5002] [--forward 127.0.0.1:5000]
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from collections import OrderedDict
+
+from core import config
+from core.log import LOG_FORMAT
+from core.video.fec import FecDecoder, is_rtp, rtp_sequence
+
+logger = logging.getLogger(__name__)
+
+# Lost packets remembered for measuring how late their recovery was.
+_MISSING_WINDOW = 1024
+
+
+class VideoFecReceiver(asyncio.DatagramProtocol):
+    """
+    Decodes the received datagrams and forwards the media packets. A recovered packet
+    is late by the time between noticing it missing and rebuilding it, which is the
+    latency FEC adds to it.
+    """
+
+    def __init__(self, forward_address):
+        """:param forward_address: (host, port) the RTP stream is forwarded to."""
+        self._forward_address = forward_address
+        self._transport = None
+        self._decoder = FecDecoder()
+        self._newest_seq = None
+        # seq -> time the packet was noticed missing
+        self._missing = OrderedDict()
+        # Decoder counters at the previous log_stats() call
+        self._logged = self.get_stats()
+        # Recovery delays since the previous log_stats() call
+        self._delay_count = 0
+        self._delay_total = 0.0
+        self._delay_max = 0.0
+
+    def connection_made(self, transport):
+        self._transport = transport
+
+    def _track_gap(self, seq, now):
+        if self._newest_seq is not None:
+            gap = (seq - self._newest_seq) & 0xffff
+            if gap >= 0x8000:
+                # Reordered packet, it was noticed missing before.
+                self._missing.pop(seq, None)
+                return
+            for i in range(1, min(gap, _MISSING_WINDOW)):
+                self._missing[(self._newest_seq + i) & 0xffff] = now
+            while len(self._missing) > _MISSING_WINDOW:
+                self._missing.popitem(last=False)
+        self._newest_seq = seq
+
+    def datagram_received(self, data, addr):
+        now = time.monotonic()
+        if is_rtp(data):
+            self._track_gap(rtp_sequence(data), now)
+        for packet in self._decoder.add(data):
+            if packet is not data:
+                noticed = self._missing.pop(rtp_sequence(packet), None)
+                delay = now - noticed if noticed is not None else 0.0
+                self._delay_count += 1
+                self._delay_total += delay
+                self._delay_max = max(self._delay_max, delay)
+            self._transport.sendto(packet, self._forward_address)
+
+    def get_stats(self):
+        """
+        :return: Dict with the total received media and parity packets and the
+                 recovered and unrecovered media packets.
+        """
+        decoder = self._decoder
+        return {
+            "media": decoder.media_received,
+            "parity": decoder.parity_received,
+            "recovered": decoder.recovered,
+            "unrecovered": decoder.unrecovered,
+        }
+
+    def log_stats(self):
+        """Logs the statistics since the previous call."""
+        total = self.get_stats()
+        stats = {key: value - self._logged[key] for key, value in total.items()}
+        lost = stats["recovered"] + stats["unrecovered"]
+        average_delay = self._delay_total / self._delay_count if self._delay_count else 0.0
+        logger.info(
+            f"Received {stats['media']} media + {stats['parity']} parity packets. "
+            f"Recovered {stats['recovered']}/{lost} lost packets "
+            f"({stats['recovered'] / lost * 100 if lost else 100:.1f}%), recovery delay "
+            f"avg {average_delay * 1000:.0f}ms, max {self._delay_max * 1000:.0f}ms."
+        )
+        self._logged = total
+        self._delay_count = 0
+        self._delay_total = 0.0
+        self._delay_max = 0.0
+
+    def close(self):
+        """Counts the still missing packets as unrecovered."""
+        self._decoder.close()
+        if self._transport:
+            self._transport.close()
+
+
+async def run(port, forward_address, stats_interval):
+    loop = asyncio.get_running_loop()
+    _, receiver = await loop.create_datagram_endpoint(
+        lambda: VideoFecReceiver(forward_address), local_addr=("0.0.0.0", port)
+    )
+    logger.info(f"Receiving video on UDP {port}, forwarding to {forward_address[0]}:{forward_address[1]}.")
+    try:
+        while True:
+            await asyncio.sleep(stats_interval)
+            receiver.log_stats()
+    finally:
+        receiver.close()
+        receiver.log_stats()
+
+
+def _address(value):
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FPV Crawler video FEC receiver")
+    parser.add_argument("--port", type=int, default=config.VIDEO_FEC_PORT,
+                        help="UDP port the crawler sends the video to.")
+    parser.add_argument("--forward", type=_address, default=("127.0.0.1", 5000),
+                        help="host:port of the video player.")
+    parser.add_argument("--stats-interval", type=float, default=config.VIDEO_FEC_STATS_INTERVAL,
+                        help="Seconds between the statistics log lines.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    try:
+        asyncio.run(run(args.port, args.forward, args.stats_interval))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,176 @@
+"""
+Optional stage between the video pipeline and the network. The GStreamer pipeline
+sends its RTP stream to VIDEO_FEC_INPUT_PORT on localhost. The packets get FEC
+parity added and are paced out to the GCS, where `python -m core.video.receiver`
+rebuilds lost packets and hands the plain RTP stream to QGC.
+"""
+import asyncio
+import logging
+import socket
+import time
+
+from collections import deque
+
+from core import config
+from core.video.fec import FecEncoder
+from core.video.pacer import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class _InputProtocol(asyncio.DatagramProtocol):
+    def __init__(self, on_packet):
+        self._on_packet = on_packet
+
+    def datagram_received(self, data, addr):
+        self._on_packet(data)
+
+
+class VideoFecSender:
+    """
+    Receives the local RTP stream, adds FEC parity packets and sends everything to
+    GROUND_CONTROL_STATION_IP:VIDEO_FEC_PORT at VIDEO_PACING_RATE.
+    """
+
+    def __init__(self, event_bus):
+        self._shutdown_event = event_bus.get_shutdown_event()
+        self._task = None
+        self._transport = None
+        self._encoder = FecEncoder()
+        self._bucket = TokenBucket()
+        # (time queued, packet)
+        self._queue = deque()
+        self._queued = asyncio.Event()
+        self._flush_timer = None
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+        self._gcs_reachable = True
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._media_packets = 0
+        self._parity_packets = 0
+        self._dropped = 0
+        self._max_delay = 0.0
+
+    def _enqueue(self, packets, media, now):
+        """Queues packets for pacing. :param media: The media packet among them, if any."""
+        for out in packets:
+            if len(self._queue) >= config.VIDEO_PACING_QUEUE_SIZE:
+                # Old video is worthless: drop from the head.
+                self._queue.popleft()
+                self._dropped += 1
+            self._queue.append((now, out))
+            if out is media:
+                self._media_packets += 1
+            else:
+                self._parity_packets += 1
+        self._queued.set()
+
+    def _schedule_flush(self):
+        """Arms the timer that closes the open FEC group when its delay has passed."""
+        deadline = self._encoder.get_deadline()
+        if deadline is not None and self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                max(0.0, deadline - time.monotonic()), self._on_flush_timer
+            )
+
+    def _on_flush_timer(self):
+        self._flush_timer = None
+        now = time.monotonic()
+        self._enqueue(self._encoder.flush_expired(now), None, now)
+        # The group the timer was armed for may have been closed; re-arm for the open one.
+        self._schedule_flush()
+
+    def _on_packet(self, packet):
+        """Encodes an incoming RTP packet and queues it with its parity packets."""
+        now = time.monotonic()
+        self._enqueue(self._encoder.add(packet, now), packet, now)
+        self._schedule_flush()
+
+    def _send(self, packet):
+        try:
+            self._socket.sendto(packet, (config.GROUND_CONTROL_STATION_IP, config.VIDEO_FEC_PORT))
+            if not self._gcs_reachable:
+                logger.info("Video stream to the GCS is flowing again.")
+                self._gcs_reachable = True
+        except BlockingIOError:
+            self._dropped += 1
+        except OSError as e:
+            self._dropped += 1
+            if self._gcs_reachable:
+                logger.warning(f"Cannot send video to the GCS: {e}. Dropping packets.")
+                self._gcs_reachable = False
+
+    async def _send_loop(self):
+        """Sends the queued packets as fast as the token bucket allows."""
+        while not self._shutdown_event.is_set():
+            try:
+                if not self._queue:
+                    self._queued.clear()
+                    await self._queued.wait()
+                    continue
+
+                now = time.monotonic()
+                delay = self._bucket.get_delay(now)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+
+                queued_at, packet = self._queue.popleft()
+                self._bucket.consume(len(packet), now)
+                self._max_delay = max(self._max_delay, now - queued_at)
+                self._send(packet)
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.exception("Error in video sender loop:")
+                await asyncio.sleep(config.ERROR_LOOP_SLEEP)
+
+    async def _stats_loop(self):
+        while not self._shutdown_event.is_set():
+            try:
+                await asyncio.sleep(config.VIDEO_FEC_STATS_INTERVAL)
+                if self._media_packets:
+                    logger.info(
+                        f"Video: {self._media_packets} media + {self._parity_packets} parity packets, "
+                        f"{self._dropped} dropped, max pacing delay {self._max_delay * 1000:.0f}ms."
+                    )
+                self._reset_stats()
+            except asyncio.CancelledError:
+                break
+
+    async def run(self):
+        """
+        Listens for the local RTP stream and runs the paced sending loop.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            self._transport, _ = await loop.create_datagram_endpoint(
+                lambda: _InputProtocol(self._on_packet),
+                local_addr=("127.0.0.1", config.VIDEO_FEC_INPUT_PORT)
+            )
+        except OSError as e:
+            logger.error(f"Cannot listen for video on port {config.VIDEO_FEC_INPUT_PORT}: {e}")
+            return
+
+        logger.info(
+            f"Video FEC sender started: 127.0.0.1:{config.VIDEO_FEC_INPUT_PORT} -> "
+            f"{config.GROUND_CONTROL_STATION_IP}:{config.VIDEO_FEC_PORT}, "
+            f"{config.VIDEO_FEC_PARITY} parity per {config.VIDEO_FEC_GROUP_SIZE} packets."
+        )
+        await asyncio.gather(self._send_loop(), self._stats_loop())
+        logger.info("Video FEC sender stopped.")
+
+    def start(self):
+        """Starts the video sender as an asyncio task."""
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def close(self):
+        """Closes the video sockets."""
+        if self._flush_timer:
+            self._flush_timer.cancel()
+        if self._transport:
+            self._transport.close()
+        self._socket.close()
@@ -0,0 +1,144 @@
+"""
+systemd watchdog integration. A thread outside the event loop watches the progress
+of the control path (MAVLink bus, control consumer/thread, failsafe loop) and only
+keeps pinging the systemd watchdog while all of them are moving. A detected stall
+fires the watchdog right away instead of waiting for WatchdogSec to run out.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+
+from core import config
+
+logger = logging.getLogger(__name__)
+
+
+def sd_notify(state):
+    """
+    Sends a state update (e.g. "READY=1") to the systemd notification socket.
+    :return: False if not running under systemd with notification enabled.
+    """
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return False
+    if address.startswith("@"):
+        # Abstract namespace socket.
+        address = "\0" + address[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(state.encode(), address)
+        return True
+    except OSError as e:
+        logger.warning(f"Failed to notify systemd ({state}): {e}")
+        return False
+
+
+def watchdog_interval():
+    """Returns the watchdog ping interval requested by systemd, or None if disabled."""
+    usec = os.environ.get("WATCHDOG_USEC")
+    if not usec:
+        return None
+    # Ping well within the timeout, as recommended by sd_watchdog_enabled(3).
+    return int(usec) / 1_000_000 / 4
+
+
+class LivenessWatchdog:
+    """
+    Checks the progress counters of the control path components from its own thread.
+    A component is stalled when its counter did not change for WATCHDOG_STALL_TIMEOUT
+    while it had work to do. Idle components (probe returns None) are never stalled.
+    """
+
+    def __init__(self, event_bus, probes):
+        """
+        :param event_bus: The event bus, used for its shutdown event.
+        :param probes: Dict of component name -> callable returning a progress counter,
+                       or None while the component is idle.
+        """
+        self._shutdown_event = event_bus.get_shutdown_event()
+        self._probes = probes
+        self._stop_event = threading.Event()
+        self._thread = None
+        # name -> (last counter value, time it was first seen)
+        self._progress = {}
+        self._ready = False
+        self._triggered = False
+        self._last_ping = 0.0
+
+    def _find_stalled(self, now):
+        """Returns the names of the components that stopped making progress."""
+        stalled = []
+        for name, probe in self._probes.items():
+            value = probe()
+            last = self._progress.get(name)
+            if value is None or last is None or value != last[0]:
+                self._progress[name] = (value, now)
+            elif now - last[1] > config.WATCHDOG_STALL_TIMEOUT:
+                stalled.append(name)
+        return stalled
+
+    def _is_live(self):
+        """True once every busy component has made progress at least once."""
+        return all(value is None or value > 0 for value, _ in self._progress.values())
+
+    def _check(self, interval):
+        now = time.monotonic()
+        stalled = self._find_stalled(now)
+
+        if not self._ready:
+            # The systemd watchdog is only armed after READY, so stalls are not
+            # reported while the components are still starting.
+            if self._is_live():
+                self._ready = True
+                self._last_ping = now
+                sd_notify("READY=1")
+                logger.info("Control path is live. Notified systemd.")
+            return
+
+        if stalled:
+            if not self._triggered:
+                self._triggered = True
+                logger.error(f"Control path stalled: {', '.join(stalled)}. Triggering the watchdog.")
+                sd_notify(f"STATUS=Stalled: {', '.join(stalled)}")
+                sd_notify("WATCHDOG=trigger")
+            return
+
+        if self._triggered:
+            self._triggered = False
+            logger.warning("Control path recovered from the stall.")
+        if interval and now - self._last_ping >= interval:
+            self._last_ping = now
+            sd_notify("WATCHDOG=1")
+
+    def _run(self):
+        interval = watchdog_interval()
+        if interval:
+            logger.info(f"Liveness watchdog started. Pinging systemd every {interval * 1000:.0f}ms.")
+        else:
+            logger.info("Liveness watchdog started. systemd watchdog is not enabled, stalls are only logged.")
+
+        while not self._stop_event.wait(config.WATCHDOG_CHECK_INTERVAL):
+            # Components stop making progress while shutting down; that is not a stall.
+            if self._shutdown_event.is_set():
+                break
+            try:
+                self._check(interval)
+            except Exception:
+                logger.exception("Error in liveness watchdog thread:")
+
+        sd_notify("STOPPING=1")
+        logger.info("Liveness watchdog stopped.")
+
+    def start(self):
+        """Starts the watchdog thread."""
+        if not self._thread:
+            self._thread = threading.Thread(target=self._run, name="crawler-watchdog", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Stops the watchdog thread."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
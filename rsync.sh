@@ -1,3 +1,3 @@
 #!/bin/bash
 
-rsync -avzP --delete --exclude='service-logs.log' --exclude='.git/' --exclude='.idea/' --exclude='.venv/' --exclude='__pycache__/' ./ brumberry:~/fpv_crawler/
+rsync -avzP --delete --exclude='service-logs.log' --exclude='crawler.json' --exclude='.git/' --exclude='.idea/' --exclude='.venv/' --exclude='__pycache__/' ./ brumberry:~/fpv_crawler/